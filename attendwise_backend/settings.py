@@ -16,6 +16,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Trigram lookups for user search
 
     # Third-party apps
     'corsheaders',
@@ -32,10 +33,12 @@ AUTH_USER_MODEL = 'core.CustomUser'
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Should be first
     'django.middleware.security.SecurityMiddleware',
+    'core.throttling.LoadSheddingMiddleware',  # Sheds load with 503 past LOAD_SHED_LIMITS
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',  # No-op unless PROFILING_ENABLED
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -91,7 +94,92 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'core.throttling.TokenBucketThrottle',  # Applies to views with a throttle_scope
+    ),
+}
+
+# Cache. LocMem is per process: with several workers, point these aliases at
+# Redis/Memcached or each worker keeps its own throttle buckets.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
 }
+# Work calendars (core.workcalendar) are compiled per process; each process re-reads the
+# shared version row (CalendarVersion) at most this often, so Shift/Holiday edits reach
+# every worker within this many seconds
+CALENDAR_VERSION_TTL = 5.0
+
+# Token-bucket throttling (core.throttling): scope -> {'user'|'ip'|'account': (burst capacity, tokens per second)}
+THROTTLE_ENABLED = True
+THROTTLE_BACKEND = 'local'  # 'local' (in-process) or 'cache' (shared via THROTTLE_CACHE)
+THROTTLE_CACHE = 'default'
+THROTTLE_LOCAL_MAX_KEYS = 10000  # 'local' backend: least recently used buckets are evicted past this
+# 'account' keys on client IP + submitted email (guessing one account), 'ip' is only a
+# flood cap: a whole office logs in from one NAT address around 9:55
+THROTTLE_BUCKETS = {
+    'login': {'account': (10, 0.2), 'ip': (500, 50.0)},
+    'register': {'ip': (10, 0.1)},
+    'checkin': {'user': (5, 0.2), 'ip': (200, 50.0)},
+    'regularize': {'user': (10, 0.1)},
+    'approve': {'user': (60, 5.0)},
+    'import': {'user': (2, 0.01)},
+}
+
+# Load shedding: max in-flight requests per process before answering 503
+LOAD_SHED_LIMITS = {'write': 32, 'read': 64}
+LOAD_SHED_RETRY_AFTER = 2
+
+# Async login (core.async_views): hashing threads and admission limit
+LOGIN_HASH_WORKERS = 4
+LOGIN_MAX_PENDING = 64
+
+# Nightly close-of-day batch (manage.py close_day)
+# 'close': check_out = check_in (0 hours), 'credit': check_out = check_in + AUTO_CHECKOUT_HOURS,
+# 'none': leave open sessions untouched
+AUTO_CHECKOUT_POLICY = 'close'
+AUTO_CHECKOUT_HOURS = 9.0
+CLOSE_OF_DAY_ROLES = ['employee', 'manager', 'hr']
+
+# Attendance rules for users without a Shift (core.workcalendar is the only reader)
+ATTENDANCE_POLICY = {
+    'START': '09:00',
+    'LATE_AFTER': '10:06',  # Check-ins after this are late
+    'END': '18:00',
+    'MIN_HOURS': 9.0,  # Hours needed for a valid day
+    'WEEKLY_OFF': [5, 6],  # date.weekday(): Saturday, Sunday
+}
+
+# Write-behind check-ins (core.checkin_buffer): acknowledge after an fsynced local
+# log append, write Attendance in batches every CHECKIN_FLUSH_INTERVAL seconds.
+# Buffers are per worker process: until a flush, the attendance list only merges in
+# punches buffered by the worker that serves the request.
+CHECKIN_WRITE_BEHIND = False
+CHECKIN_LOG_DIR = BASE_DIR / 'var' / 'checkin-log'
+CHECKIN_FLUSH_INTERVAL = 0.25
+
+# Today-status cache (core.today_status): per-user entries expire at local midnight.
+# Prefer a shared cache (Redis/Memcached). With a per-process LocMem alias the duplicate
+# punch short-circuits still apply, but the status endpoint re-reads the DB for an entry
+# another worker may have changed (not yet checked out) once it is TODAY_STATUS_LOCAL_TTL old.
+TODAY_STATUS_CACHE = 'default'
+TODAY_STATUS_NEGATIVE_TTL = 60  # Seconds to trust "not checked in yet"
+TODAY_STATUS_LOCAL_TTL = 10
+
+# Audit trail (core.audit): events are buffered in-process and bulk-inserted every
+# AUDIT_FLUSH_INTERVAL seconds, or sooner once AUDIT_BATCH_SIZE are waiting
+AUDIT_ENABLED = True
+AUDIT_FLUSH_INTERVAL = 1.0
+AUDIT_BATCH_SIZE = 500
+AUDIT_MAX_PENDING = 100000  # Cap while the DB is unreachable; extra events are dropped and logged
+
+# Request profiling (core.profiling): admins send the header, or a random sample is taken
+PROFILING_ENABLED = False
+PROFILING_HEADER = 'HTTP_X_PROFILE'  # i.e. "X-Profile: 1"
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_INTERVAL = 0.005  # Seconds between stack samples
+PROFILING_DIR = BASE_DIR / 'var' / 'profiles'
 
 # Internationalization
 LANGUAGE_CODE = 'en-us'
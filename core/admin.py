@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser
+from django.core.exceptions import FieldDoesNotExist
+from . import audit
+from .models import AuditEvent, CustomUser, Shift, Holiday
 
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
@@ -8,19 +10,65 @@ class CustomUserAdmin(UserAdmin):
     list_filter = ('role', 'is_staff', 'is_superuser')
 
     fieldsets = (
-        (None, {'fields': ('email', 'full_name', 'password', 'role', 'manager')}),
+        (None, {'fields': ('email', 'full_name', 'password', 'role', 'manager', 'shift')}),
         ('Permissions', {'fields': ('is_staff', 'is_superuser', 'groups', 'user_permissions')}),
-        ('Important dates', {'fields': ('last_login', 'date_joined')}),
+        ('Important dates', {'fields': ('last_login',)}),
     )
 
     add_fieldsets = (
         (None, {
             'classes': ('wide',),
-            'fields': ('email', 'full_name', 'role', 'manager', 'password1', 'password2', 'is_staff', 'is_superuser')}
+            'fields': ('email', 'full_name', 'role', 'manager', 'shift', 'password1', 'password2', 'is_staff', 'is_superuser')}
         ),
     )
 
     search_fields = ('email', 'full_name')
     ordering = ('email',)
 
+    # ✅ Audit admin edits: changed field names, with values for everything but secrets and m2m
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        changes = {}
+        for name in form.changed_data:
+            try:
+                field = obj._meta.get_field(name)
+            except FieldDoesNotExist:  # password1 / password2 on the add form
+                changes['password'] = None
+                continue
+            secret = name == 'password' or field.many_to_many
+            changes[name] = None if secret else obj.serializable_value(name)
+        audit.record('user_update' if change else 'user_create', request.user, obj, obj, changes=changes)
+
 admin.site.register(CustomUser, CustomUserAdmin)
+
+
+class ShiftAdmin(admin.ModelAdmin):
+    list_display = ('name', 'start_time', 'late_after', 'end_time', 'min_hours', 'weekly_off')
+
+
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ('date', 'name', 'shift')
+    list_filter = ('shift',)
+    date_hierarchy = 'date'
+
+
+admin.site.register(Shift, ShiftAdmin)
+admin.site.register(Holiday, HolidayAdmin)
+
+
+class AuditEventAdmin(admin.ModelAdmin):
+    list_display = ('occurred_at', 'action', 'actor', 'subject', 'object_type', 'object_id')
+    list_filter = ('action',)
+
+    # Append-only: viewable, never edited here
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(AuditEvent, AuditEventAdmin)
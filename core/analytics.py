@@ -0,0 +1,112 @@
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractHour, ExtractMinute, TruncWeek
+from django.utils.timezone import localtime
+
+from .models import Attendance, ArrivalBucket, CustomUser
+from .workcalendar import default_late_after
+
+BUCKET_MINUTES = 5
+
+
+def bucket_for(hour, minute):
+    return (hour * 60 + minute) // BUCKET_MINUTES
+
+
+def bucket_label(bucket):
+    minutes = bucket * BUCKET_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _bump_bucket(key, n):
+    if ArrivalBucket.objects.filter(**key).update(count=F('count') + n):
+        return
+    try:
+        with transaction.atomic():
+            ArrivalBucket.objects.create(count=n, **key)
+    except IntegrityError:
+        # Another check-in created the bucket first
+        ArrivalBucket.objects.filter(**key).update(count=F('count') + n)
+
+
+# ✅ Incremental update, called from CheckInView inside its transaction; counts the
+# arrival under the user's manager at check-in time
+def record_arrival(user, date, check_in):
+    record_arrivals([(user.manager_id, date, check_in)])
+
+
+# ✅ Batched variant for flushed check-ins: one UPDATE per distinct bucket
+def record_arrivals(arrivals):
+    counts = defaultdict(int)
+    for manager_id, date, check_in in arrivals:
+        local = localtime(check_in)
+        counts[(manager_id or 0, date, bucket_for(local.hour, local.minute))] += 1
+    for (team, date, bucket), n in counts.items():
+        _bump_bucket({'team': team, 'date': date, 'bucket': bucket}, n)
+
+
+# ✅ Rebuild buckets for a date range from raw Attendance rows. An arrival belongs to the
+# team the user was in at check-in (Attendance.team), as in record_arrival, so a rebuild
+# after someone changes manager reproduces the incremental counts instead of rewriting them.
+def backfill_arrivals(start, end):
+    rows = (
+        Attendance.objects.filter(date__range=(start, end))
+        .annotate(hour=ExtractHour('check_in'), minute=ExtractMinute('check_in'))
+        .values('team', 'date', 'hour', 'minute')
+        .annotate(n=Count('id'))
+    )
+    counts = defaultdict(int)
+    for row in rows.iterator():
+        key = (row['team'], row['date'], bucket_for(row['hour'], row['minute']))
+        counts[key] += row['n']
+
+    buckets = [
+        ArrivalBucket(team=team, date=date, bucket=bucket, count=n)
+        for (team, date, bucket), n in counts.items()
+    ]
+    with transaction.atomic():
+        ArrivalBucket.objects.filter(date__range=(start, end)).delete()
+        ArrivalBucket.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
+
+
+# ✅ Histogram per team per day/week, read from the bucket table only
+def arrival_histogram(start, end, teams=None, group='week'):
+    queryset = ArrivalBucket.objects.filter(date__range=(start, end))
+    if teams is not None:
+        queryset = queryset.filter(team__in=teams)
+
+    period = TruncWeek('date') if group == 'week' else F('date')
+    rows = (
+        queryset.annotate(period=period)
+        .values('team', 'period', 'bucket')
+        .annotate(n=Sum('count'))
+        .order_by('team', 'period', 'bucket')
+    )
+
+    series = {}
+    for row in rows:
+        entry = series.setdefault((row['team'], row['period']), {
+            'team': row['team'],
+            'period': row['period'],
+            'total': 0,
+            'buckets': [],
+        })
+        entry['buckets'].append([bucket_label(row['bucket']), row['n']])
+        entry['total'] += row['n']
+
+    names = dict(
+        CustomUser.objects.filter(id__in={team for team, _ in series}).values_list('id', 'full_name')
+    )
+    for entry in series.values():
+        entry['team_name'] = names.get(entry['team'], 'No manager')
+
+    cutoff = default_late_after()
+    return {
+        'bucket_minutes': BUCKET_MINUTES,
+        'late_cutoff': cutoff.strftime('%H:%M'),
+        'cutoff_bucket': bucket_label(bucket_for(cutoff.hour, cutoff.minute)),
+        'group': group,
+        'series': list(series.values()),
+    }
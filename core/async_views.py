@@ -0,0 +1,311 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+from django.utils.timezone import localdate, localtime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import serializers
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import checkin_buffer, workcalendar
+from .models import Attendance, CustomUser, RegularizationRequest
+from .throttling import athrottle_wait
+
+# ✅ Bounded pool for password checks. PBKDF2 (hashlib) releases the GIL,
+# so these threads hash in parallel while the event loop keeps serving.
+LOGIN_HASH_WORKERS = getattr(settings, 'LOGIN_HASH_WORKERS', 4)
+# Logins allowed to wait for or occupy a hashing thread before we shed load
+LOGIN_MAX_PENDING = getattr(settings, 'LOGIN_MAX_PENDING', 64)
+LOGIN_RETRY_AFTER = getattr(settings, 'LOGIN_RETRY_AFTER', 1)
+
+_login_executor = ThreadPoolExecutor(max_workers=LOGIN_HASH_WORKERS, thread_name_prefix='login-hash')
+_pending_lock = threading.Lock()
+_pending = 0
+
+
+def _admit():
+    global _pending
+    with _pending_lock:
+        if _pending >= LOGIN_MAX_PENDING:
+            return False
+        _pending += 1
+        return True
+
+
+def _release():
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def _login(email, password):
+    # Runs on a hashing thread, outside the request cycle, so manage the connection here
+    close_old_connections()
+    try:
+        user = authenticate(None, email=email, password=password)
+        if not user:
+            return None
+        refresh = RefreshToken.for_user(user)
+        return {
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+            'user': {
+                'id': user.id,
+                'email': user.email,
+                'full_name': user.full_name,
+                'role': user.role,
+            }
+        }
+    finally:
+        close_old_connections()
+
+
+def _parse_credentials(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            data = {}
+        if not isinstance(data, dict):
+            # e.g. a JSON list or number: no credentials, same 401 as LoginView
+            data = {}
+    else:
+        data = request.POST
+    email, password = data.get('email'), data.get('password')
+    if not isinstance(email, str) or not isinstance(password, str):
+        return None, None
+    return email, password
+
+
+# ✅ Async Login (same contract as LoginView, hashing kept off the event loop)
+@csrf_exempt
+@require_POST
+async def async_login(request):
+    email, password = _parse_credentials(request)
+    wait = await athrottle_wait('login', request.META.get('REMOTE_ADDR'), account=email)
+    if wait:
+        response = JsonResponse({'error': 'Too many login attempts, retry shortly'}, status=429)
+        response['Retry-After'] = str(int(wait) + 1)
+        return response
+
+    if not email or not password:
+        return JsonResponse({'error': 'Invalid credentials'}, status=401)
+
+    if not _admit():
+        response = JsonResponse({'error': 'Too many login attempts in progress, retry shortly'}, status=503)
+        response['Retry-After'] = str(LOGIN_RETRY_AFTER)
+        return response
+
+    try:
+        loop = asyncio.get_running_loop()
+        payload = await loop.run_in_executor(_login_executor, _login, email, password)
+    finally:
+        _release()
+
+    if payload is None:
+        return JsonResponse({'error': 'Invalid credentials'}, status=401)
+    return JsonResponse(payload)
+
+
+# ✅ Async JWT authentication: token checks are pure CPU, the user lookup uses the async ORM
+_jwt = JWTAuthentication()
+
+
+class NotAuthenticated(Exception):
+    pass
+
+
+async def aauthenticate(request):
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        raise NotAuthenticated('Authentication credentials were not provided.')
+    try:
+        token = _jwt.get_validated_token(raw_token)
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        raise NotAuthenticated('Given token not valid for any token type')
+    user = await CustomUser.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).select_related('manager').afirst()
+    if user is None or not user.is_active:
+        raise NotAuthenticated('User not found')
+    return user
+
+
+# Same responses as JWTAuthentication + IsAuthenticated and the role checks in views.py
+def async_jwt_required(roles=None):
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                user = await aauthenticate(request)
+            except NotAuthenticated as e:
+                response = JsonResponse({'detail': str(e)}, status=401)
+                response['WWW-Authenticate'] = f'{jwt_settings.AUTH_HEADER_TYPES[0]} realm="api"'
+                return response
+            if roles and user.role not in roles:
+                return JsonResponse({'error': 'Unauthorized'}, status=403)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ✅ Output matches AttendanceSerializer / RegularizationRequestSerializer
+_date = serializers.DateField()
+_datetime = serializers.DateTimeField()
+
+
+def _fmt_datetime(value):
+    return _datetime.to_representation(value) if value is not None else None
+
+
+async def _approved_days(rows):
+    # One query for every is_regularized flag on the page
+    if not rows:
+        return set()
+    approved = RegularizationRequest.objects.filter(
+        status='approved',
+        user_id__in={a.user_id for a in rows},
+        date__in={a.date for a in rows},
+    ).values_list('user_id', 'date')
+    return {pair async for pair in approved}
+
+
+async def _attendance_rows(queryset):
+    rows = [a async for a in queryset.select_related('user').aiterator()]
+    approved = await _approved_days(rows)
+    data = []
+    for a in rows:
+        local = localtime(a.check_in)
+        cal = await workcalendar.amonth_calendar(a.user.shift_id, local.year, local.month)
+        late = workcalendar.is_late_in(cal, a.check_in)
+        regularized = (a.user_id, a.date) in approved
+        valid = a.total_hours >= cal.min_hours and (not late or regularized)
+        data.append({
+            'id': a.id,
+            'user': a.user_id,
+            'user_name': a.user.full_name,
+            'date': _date.to_representation(a.date),
+            'check_in': _fmt_datetime(a.check_in),
+            'check_out': _fmt_datetime(a.check_out),
+            'total_hours': a.total_hours,
+            'auto_closed': a.auto_closed,
+            'status': 'green' if valid else 'red',
+            'is_late': late,
+            'is_regularized': regularized,
+        })
+    return data
+
+
+def _regularization_row(reg):
+    return {
+        'id': reg.id,
+        'user': reg.user_id,
+        'user_name': reg.user.full_name,
+        'date': _date.to_representation(reg.date),
+        'reason': reg.reason,
+        'status': reg.status,
+        'created_at': _fmt_datetime(reg.created_at),
+        'approved_by': reg.approved_by_id,
+        'approved_by_name': reg.approved_by.full_name if reg.approved_by_id else '---',
+        'submitted_by_role': reg.user.role,
+    }
+
+
+# ✅ Async Employee Attendance (same contract as EmployeeAttendanceList)
+@require_GET
+@async_jwt_required()
+async def async_employee_attendance(request):
+    data = await _attendance_rows(Attendance.objects.filter(user=request.user).order_by('-date'))
+
+    if checkin_buffer.is_enabled():
+        # Merge in check-ins that are acknowledged but not flushed yet
+        buffer = await sync_to_async(checkin_buffer.get_buffer)()
+        flushed = {row['date'] for row in data}
+        unflushed = [
+            {
+                'id': None, 'user': request.user.id, 'user_name': request.user.full_name,
+                'date': e['date'].isoformat(), 'check_in': _fmt_datetime(e['check_in']),
+                'check_out': None, 'total_hours': 0.0, 'auto_closed': False, 'status': 'red',
+                'is_late': workcalendar.is_late_in(
+                    await workcalendar.amonth_calendar(request.user.shift_id, e['date'].year, e['date'].month),
+                    e['check_in'],
+                ),
+                'is_regularized': False,
+            }
+            for e in buffer.pending_for_user(request.user.id) if e['date'].isoformat() not in flushed
+        ]
+        data = unflushed + data
+    return JsonResponse(data, safe=False)
+
+
+# ✅ Async Team Attendance (same contract as TeamAttendanceView)
+@require_GET
+@async_jwt_required()
+async def async_team_attendance(request):
+    queryset = Attendance.objects.filter(user__manager=request.user)
+
+    emp = request.GET.get('employee')
+    day = request.GET.get('date')
+    if emp:
+        if not emp.isdigit():
+            return JsonResponse({'error': 'Invalid employee'}, status=400)
+        # Someone outside the team has no rows here; skip the join entirely
+        if not await CustomUser.objects.filter(pk=emp, manager=request.user).aexists():
+            return JsonResponse([], safe=False)
+        queryset = queryset.filter(user__id=emp)
+    if day:
+        try:
+            day = parse_date(day)
+        except ValueError:
+            day = None
+        if day is None:
+            return JsonResponse({'error': 'Invalid date'}, status=400)
+        queryset = queryset.filter(date=day)
+
+    return JsonResponse(await _attendance_rows(queryset.order_by('-date')), safe=False)
+
+
+# ✅ Async My Regularizations (same contract as MyRegularizations)
+@require_GET
+@async_jwt_required()
+async def async_my_regularizations(request):
+    queryset = RegularizationRequest.objects.filter(
+        user=request.user
+    ).select_related('user', 'approved_by').order_by('-date')
+    return JsonResponse([_regularization_row(reg) async for reg in queryset.aiterator()], safe=False)
+
+
+# ✅ Async HR Today Summary (same contract as HRTodaySummaryView)
+@require_GET
+@async_jwt_required(roles=['hr'])
+async def async_hr_summary(request):
+    today = localdate()
+    attendances = Attendance.objects.filter(date=today)
+
+    total_present = await attendances.acount()
+    late = 0
+    if total_present:
+        shift_ids = [s async for s in attendances.values_list('user__shift_id', flat=True).distinct()]
+        late = await attendances.filter(await workcalendar.alate_filter(today, shift_ids)).acount()
+    pending_requests = await RegularizationRequest.objects.filter(status='pending').acount()
+
+    return JsonResponse({
+        'present_today': total_present,
+        'on_time': total_present - late,
+        'late_arrivals': late,
+        'pending_requests': pending_requests
+    })
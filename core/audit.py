@@ -0,0 +1,217 @@
+import logging
+import threading
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils.timezone import localdate, localtime, make_aware, now
+
+from .buffering import PeriodicFlusher
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+def is_enabled():
+    return getattr(settings, 'AUDIT_ENABLED', True)
+
+
+def month_key(day):
+    return day.year * 100 + day.month
+
+
+def _id(value):
+    return getattr(value, 'pk', value)
+
+
+# ✅ Build an event; nothing touches the DB until the buffer flushes
+def event(action, actor=None, subject=None, obj=None, **details):
+    occurred_at = now()
+    return {
+        'month': month_key(localtime(occurred_at)),
+        'occurred_at': occurred_at,
+        'action': action,
+        'actor': _id(actor),
+        'subject': _id(subject),
+        'object_type': obj._meta.model_name if obj is not None else '',
+        'object_id': obj.pk if obj is not None else None,
+        'details': details,
+    }
+
+
+# ✅ In-process buffer, bulk-inserted by a flusher thread every AUDIT_FLUSH_INTERVAL
+# seconds or as soon as AUDIT_BATCH_SIZE events are waiting
+class AuditBuffer:
+    def __init__(self, interval, batch_size, max_pending):
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._events = []
+        self.flusher = PeriodicFlusher('audit-flusher', interval, self.flush)
+
+    def extend(self, events):
+        with self._lock:
+            room = self.max_pending - len(self._events)
+            if room < len(events):
+                # The DB has been unreachable for a long time; cap memory rather than grow forever
+                self.dropped += len(events) - max(room, 0)
+                logger.error("Audit buffer full, dropped %d events so far", self.dropped)
+                events = events[:max(room, 0)]
+            self._events.extend(events)
+            full = len(self._events) >= self.batch_size
+        if full:
+            self.flusher.wake()
+
+    def flush(self):
+        with self._lock:
+            batch, self._events = self._events, []
+        if not batch:
+            return 0
+        try:
+            with transaction.atomic():
+                AuditEvent.objects.bulk_create([AuditEvent(**e) for e in batch], batch_size=self.batch_size)
+        except Exception:
+            # Put the batch back in front, in order, for the next attempt
+            with self._lock:
+                self._events[:0] = batch
+            raise
+        return len(batch)
+
+    def close(self):
+        self.flusher.stop()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AuditBuffer(
+                    getattr(settings, 'AUDIT_FLUSH_INTERVAL', 1.0),
+                    getattr(settings, 'AUDIT_BATCH_SIZE', 500),
+                    getattr(settings, 'AUDIT_MAX_PENDING', 100000),
+                )
+    return _buffer
+
+
+def flush():
+    return get_buffer().flush() if _buffer is not None else 0
+
+
+def shutdown():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is not None:
+            _buffer.close()
+            _buffer = None
+
+
+# ✅ Queue events once the surrounding transaction commits (immediately outside one),
+# so rolled-back writes leave no trail
+def record_many(events):
+    if not is_enabled() or not events:
+        return
+    transaction.on_commit(lambda: get_buffer().extend(events))
+
+
+def record(action, actor=None, subject=None, obj=None, **details):
+    if is_enabled():
+        record_many([event(action, actor, subject, obj, **details)])
+
+
+# ✅ Query API: actor / subject / time filters use their indexes; the month filter
+# lets Postgres skip partitions outside the range
+def _months_between(start, end):
+    months = []
+    key = month_key(start)
+    while key <= month_key(end):
+        months.append(key)
+        key = _next_month(key)
+    return months
+
+
+def events(actor=None, subject=None, start=None, end=None, action=None):
+    queryset = AuditEvent.objects.all()
+    if start and end:
+        queryset = queryset.filter(month__in=_months_between(start, end))
+    elif start:
+        queryset = queryset.filter(month__gte=month_key(start))
+    elif end:
+        queryset = queryset.filter(month__lte=month_key(end))
+    if start:
+        queryset = queryset.filter(occurred_at__gte=make_aware(datetime.combine(start, time.min)))
+    if end:
+        queryset = queryset.filter(occurred_at__lt=make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+    if actor is not None:
+        queryset = queryset.filter(actor=_id(actor))
+    if subject is not None:
+        queryset = queryset.filter(subject=_id(subject))
+    if action:
+        queryset = queryset.filter(action=action)
+    return queryset.order_by('-occurred_at', '-id')
+
+
+# ✅ Monthly partitions (Postgres only): create them ahead, drop whole months on purge
+def _next_month(key):
+    year, month = divmod(key, 100)
+    return (year + 1) * 100 + 1 if month == 12 else key + 1
+
+
+def _partitioned():
+    return connection.vendor == 'postgresql'
+
+
+def _partitions():
+    table = AuditEvent._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f"{table}_p"
+    return {int(name[len(prefix):]): name for name in names if name.startswith(prefix)}
+
+
+def ensure_partitions(months_ahead=3):
+    if not _partitioned():
+        return []
+    table = AuditEvent._meta.db_table
+    existing = _partitions()
+    created = []
+    key = month_key(localdate())
+    for _ in range(months_ahead):
+        if key not in existing:
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(
+                        f"CREATE TABLE {table}_p{key} PARTITION OF {table} "
+                        f"FOR VALUES FROM ({key}) TO ({_next_month(key)})"
+                    )
+                created.append(key)
+            except DatabaseError:
+                # The default partition already holds rows for this month; leave them there
+                logger.warning("Could not create audit partition %s", key)
+        key = _next_month(key)
+    return created
+
+
+def purge_before(day):
+    cutoff = month_key(day)
+    queryset = AuditEvent.objects.filter(month__lt=cutoff)
+    purged = queryset.count()
+    if _partitioned():
+        with transaction.atomic(), connection.cursor() as cursor:
+            for key, name in sorted(_partitions().items()):
+                if key < cutoff:
+                    cursor.execute(f"DROP TABLE {name}")
+    # Whatever is left lives in the default partition (or the plain table elsewhere);
+    # QuerySet.delete() skips the per-instance append-only guard by design
+    queryset.delete()
+    return purged
@@ -0,0 +1,48 @@
+import atexit
+import logging
+import threading
+
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+
+# ✅ Background thread that calls flush_fn every `interval` seconds (or sooner on wake()).
+# Shared by the write-behind buffers; flush_fn must be safe to call repeatedly.
+class PeriodicFlusher:
+    def __init__(self, name, interval, flush_fn):
+        self.name = name
+        self.interval = interval
+        self.flush_fn = flush_fn
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def wake(self):
+        self._wake.set()
+
+    def _flush_once(self):
+        try:
+            close_old_connections()
+            self.flush_fn()
+        except Exception:
+            logger.exception("%s: flush failed, will retry", self.name)
+            # Drop a possibly broken connection so the next attempt reconnects
+            connection.close()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._flush_once()
+
+    def stop(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        # Final flush on shutdown from the calling thread
+        self._flush_once()
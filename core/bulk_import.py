@@ -0,0 +1,186 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from . import audit
+from .models import CustomUser
+from .search import index_users
+
+ROLES = {choice for choice, _ in CustomUser.ROLE_CHOICES}
+
+# Below this many rows a process pool costs more than it saves
+POOL_THRESHOLD = getattr(settings, 'BULK_IMPORT_POOL_THRESHOLD', 50)
+CHUNK_SIZE = getattr(settings, 'BULK_IMPORT_CHUNK_SIZE', 500)
+
+
+# ✅ Parse an uploaded CSV or JSON payload into a list of row dicts
+def parse_rows(content, fmt):
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if fmt == 'json':
+        data = json.loads(content)
+        if isinstance(data, dict):
+            data = data.get('users', [])
+        if not isinstance(data, list):
+            raise ValueError("JSON payload must be a list of users")
+        return data
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _clean(value):
+    return str(value or '').strip()
+
+
+TEXT_FIELDS = ['email', 'full_name', 'role', 'password', 'manager_email', 'manager']
+
+
+# ✅ Validate every row before anything touches the database
+def validate_rows(rows):
+    errors = {}
+    cleaned = []
+    seen = set()
+
+    for index, raw in enumerate(rows, start=1):
+        if not isinstance(raw, dict):
+            errors[index] = ["Row must be an object with email, full_name, role and password."]
+            continue
+        # JSON rows may carry numbers, lists or objects; only strings are usable
+        wrong_type = [f for f in TEXT_FIELDS if raw.get(f) is not None and not isinstance(raw[f], str)]
+        if wrong_type:
+            errors[index] = [f"{f} must be a string." for f in wrong_type]
+            continue
+        row_errors = []
+        email = CustomUser.objects.normalize_email(_clean(raw.get('email')))
+        full_name = _clean(raw.get('full_name'))
+        role = _clean(raw.get('role')) or 'employee'
+        password = raw.get('password') or ''
+        manager_email = _clean(raw.get('manager_email') or raw.get('manager'))
+
+        try:
+            validate_email(email)
+        except ValidationError:
+            row_errors.append("Invalid email.")
+        if email.lower() in seen:
+            row_errors.append("Duplicate email in file.")
+        seen.add(email.lower())
+
+        if not full_name:
+            row_errors.append("full_name is required.")
+        if role not in ROLES:
+            row_errors.append(f"Invalid role '{role}'.")
+
+        try:
+            validate_password(password, CustomUser(email=email, full_name=full_name))
+        except ValidationError as e:
+            row_errors.extend(e.messages)
+
+        if row_errors:
+            errors[index] = row_errors
+        cleaned.append({
+            'row': index,
+            'email': email,
+            'full_name': full_name,
+            'role': role,
+            'password': password,
+            'manager_email': manager_email or None,
+        })
+
+    # Emails are compared case-insensitively everywhere: one query for emails already
+    # registered, one to resolve every referenced manager
+    by_email = CustomUser.objects.annotate(email_lower=Lower('email'))
+    emails = {r['email'].lower() for r in cleaned}
+    existing = set(by_email.filter(email_lower__in=emails).values_list('email_lower', flat=True))
+    manager_emails = {r['manager_email'].lower() for r in cleaned if r['manager_email']}
+    managers = dict(by_email.filter(email_lower__in=manager_emails).values_list('email_lower', 'id'))
+    in_file = {r['email'].lower() for r in cleaned}
+
+    for r in cleaned:
+        if r['email'].lower() in existing:
+            errors.setdefault(r['row'], []).append("Email already registered.")
+        m = r['manager_email']
+        if m and m.lower() not in managers and m.lower() not in in_file:
+            errors.setdefault(r['row'], []).append(f"Unknown manager '{m}'.")
+        r['manager_id'] = managers.get(m.lower()) if m else None
+
+    return cleaned, errors
+
+
+def _init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendwise_backend.settings')
+    import django
+    django.setup()
+
+
+# ✅ Hash passwords across a process pool (PBKDF2 is CPU bound)
+def hash_passwords(passwords, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if len(passwords) < POOL_THRESHOLD or workers == 1:
+        return [make_password(p) for p in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+# ✅ Validate, hash and insert a batch of users; returns a per-row report
+def import_users(rows, workers=None, dry_run=False, actor=None):
+    rows = list(rows)
+    cleaned, errors = validate_rows(rows)
+    report = {
+        'total': len(rows),
+        'created': 0,
+        'errors': [{'row': row, 'errors': msgs} for row, msgs in sorted(errors.items())],
+    }
+    if errors or dry_run:
+        return report
+
+    hashes = hash_passwords([r['password'] for r in cleaned], workers=workers)
+    users = [
+        CustomUser(
+            email=r['email'],
+            full_name=r['full_name'],
+            role=r['role'],
+            manager_id=r['manager_id'],
+            password=hashed,
+        )
+        for r, hashed in zip(cleaned, hashes)
+    ]
+
+    with transaction.atomic():
+        for start in range(0, len(users), CHUNK_SIZE):
+            CustomUser.objects.bulk_create(users[start:start + CHUNK_SIZE])
+
+        # Managers created in this same batch are linked in a second pass
+        pending = [r for r in cleaned if r['manager_email'] and not r['manager_id']]
+        if pending:
+            emails = {r['manager_email'].lower() for r in pending} | {r['email'].lower() for r in pending}
+            ids = dict(
+                CustomUser.objects.annotate(email_lower=Lower('email'))
+                .filter(email_lower__in=emails).values_list('email_lower', 'id')
+            )
+            linked = [
+                CustomUser(id=ids[r['email'].lower()], manager_id=ids[r['manager_email'].lower()])
+                for r in pending
+            ]
+            CustomUser.objects.bulk_update(linked, ['manager'], batch_size=CHUNK_SIZE)
+
+        # bulk_create skips save(), so index the new users for search here
+        created = list(CustomUser.objects.filter(email__in=[u.email for u in users]).only('id', 'email', 'full_name', 'role'))
+        index_users(created)
+        audit.record_many([
+            audit.event('user_import', actor, user, user, email=user.email, role=user.role) for user in created
+        ])
+
+    report['created'] = len(users)
+    return report
@@ -0,0 +1,257 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .analytics import record_arrivals
+from .buffering import PeriodicFlusher
+from .models import Attendance
+
+logger = logging.getLogger(__name__)
+
+LOG_PREFIX = 'checkins-'
+LOG_SUFFIX = '.log'
+
+
+def is_enabled():
+    return getattr(settings, 'CHECKIN_WRITE_BEHIND', False)
+
+
+def _encode(entry):
+    return (json.dumps({
+        'user': entry['user'],
+        'manager': entry['manager'],
+        'date': entry['date'].isoformat(),
+        'check_in': entry['check_in'].isoformat(),
+    }) + '\n').encode()
+
+
+def _read_log(path):
+    entries = []
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                raw = json.loads(line)
+                entries.append({
+                    'user': raw['user'],
+                    'manager': raw['manager'],
+                    'date': parse_date(raw['date']),
+                    'check_in': parse_datetime(raw['check_in']),
+                })
+            except (ValueError, KeyError, TypeError):
+                # Torn final line from a crash mid-write
+                logger.warning("Skipping unreadable check-in log line in %s", path)
+    return entries
+
+
+# ✅ Insert entries that are not in Attendance yet; safe to repeat after a crash or
+# from several processes at once (the unique (user, date) constraint has the last word)
+def write_entries(entries):
+    if not entries:
+        return 0
+    with transaction.atomic():
+        existing = set(
+            Attendance.objects.filter(
+                user_id__in={e['user'] for e in entries},
+                date__in={e['date'] for e in entries},
+            ).values_list('user_id', 'date')
+        )
+        fresh = []
+        for e in entries:
+            key = (e['user'], e['date'])
+            if key not in existing:
+                existing.add(key)
+                fresh.append(e)
+        if not fresh:
+            return 0
+
+        Attendance.objects.bulk_create([
+            Attendance(user_id=e['user'], date=e['date'], check_in=e['check_in'], team=e['manager'] or 0)
+            for e in fresh
+        ], ignore_conflicts=True)
+        # Another worker may have won a row in between; count arrivals only for rows that hold our punch
+        stored = set(
+            Attendance.objects.filter(
+                user_id__in={e['user'] for e in fresh},
+                date__in={e['date'] for e in fresh},
+            ).values_list('user_id', 'date', 'check_in')
+        )
+        written = [e for e in fresh if (e['user'], e['date'], e['check_in']) in stored]
+        record_arrivals([(e['manager'], e['date'], e['check_in']) for e in written])
+    return len(written)
+
+
+# ✅ Write-behind buffer: punches are fsynced to a per-process append-only log,
+# acknowledged, then written to Attendance in batches by a flusher thread.
+class CheckInBuffer:
+    def __init__(self, directory, interval):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"{LOG_PREFIX}{os.getpid()}{LOG_SUFFIX}"
+        self._lock = threading.Lock()
+        # Held for a whole flush so the flusher thread and request threads never write the same batch
+        self._flush_lock = threading.Lock()
+        self._pending = {}  # (user_id, date) -> entry, in arrival order
+        # Group commit: appends are numbered; one fsync makes every append up to its number durable
+        self._appended = 0
+        self._synced = 0
+        self._syncing = False
+        self._sync_cond = threading.Condition()
+        # Recover first: a stale log may carry our (reused) pid
+        self.recovered = self.recover()
+        self._fd = self._open_locked(self.path)
+        self.flusher = PeriodicFlusher('checkin-flusher', interval, self.flush)
+
+    @staticmethod
+    def _open_locked(path, truncate=False):
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | (os.O_TRUNC if truncate else 0)
+        fd = os.open(path, flags, 0o640)
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+
+    # ✅ Replay logs left behind by dead processes (their flock is free)
+    def recover(self):
+        replayed = 0
+        for path in sorted(self.directory.glob(f"{LOG_PREFIX}*{LOG_SUFFIX}")):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)  # Owned by a live process
+                continue
+            try:
+                # A live owner may have compacted (replaced) the log after we opened it,
+                # releasing the old inode's lock; only touch the file we actually locked
+                try:
+                    if path.stat().st_ino != os.fstat(fd).st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue
+                replayed += write_entries(_read_log(path))
+                if path.stat().st_ino == os.fstat(fd).st_ino:
+                    path.unlink()
+            finally:
+                os.close(fd)
+        if replayed:
+            logger.info("Replayed %d buffered check-ins from crashed workers", replayed)
+        return replayed
+
+    def is_pending(self, user_id, date):
+        return (user_id, date) in self._pending
+
+    def pending_for_user(self, user_id):
+        with self._lock:
+            return [e for (uid, _), e in self._pending.items() if uid == user_id]
+
+    # ✅ Durable append; returns False if this user already has a buffered punch for the day.
+    # The append happens under the buffer lock, the fsync outside it, shared by every waiter.
+    def submit(self, user, date, check_in):
+        entry = {'user': user.id, 'manager': user.manager_id, 'date': date, 'check_in': check_in}
+        with self._lock:
+            if (user.id, date) in self._pending:
+                return False
+            os.write(self._fd, _encode(entry))
+            self._appended += 1
+            seq = self._appended
+            self._pending[(user.id, date)] = entry
+        self._sync_through(seq)
+        return True
+
+    def _sync_through(self, seq):
+        with self._sync_cond:
+            while self._synced < seq:
+                if not self._syncing:
+                    self._syncing = True
+                    break
+                self._sync_cond.wait()
+            else:
+                return
+
+        # This thread leads the next fsync; it covers every append made so far
+        synced = 0
+        try:
+            with self._lock:
+                target = self._appended
+                fd = os.dup(self._fd)  # _compact may swap and close self._fd meanwhile
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            synced = target
+        finally:
+            # On failure a waiter takes over and retries the fsync
+            with self._sync_cond:
+                self._syncing = False
+                self._synced = max(self._synced, synced)
+                self._sync_cond.notify_all()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending.values())
+            if not batch:
+                return 0
+            written = write_entries(batch)
+            with self._lock:
+                for e in batch:
+                    self._pending.pop((e['user'], e['date']), None)
+                self._compact()
+            return written
+
+    def _compact(self):
+        # Rewrite the log with only unflushed entries; rename keeps it crash-safe
+        tmp = self.path.with_suffix('.tmp')
+        fd = self._open_locked(tmp, truncate=True)
+        try:
+            for e in self._pending.values():
+                os.write(fd, _encode(e))
+            os.fsync(fd)
+            os.replace(tmp, self.path)
+        except Exception:
+            os.close(fd)
+            raise
+        os.close(self._fd)
+        self._fd = fd
+        # Every append so far is now either in Attendance or in the fsynced new log
+        with self._sync_cond:
+            self._synced = max(self._synced, self._appended)
+            self._sync_cond.notify_all()
+
+    def close(self):
+        self.flusher.stop()
+        os.close(self._fd)
+        if not self._pending:
+            self.path.unlink(missing_ok=True)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = CheckInBuffer(
+                    settings.CHECKIN_LOG_DIR,
+                    getattr(settings, 'CHECKIN_FLUSH_INTERVAL', 0.25),
+                )
+    return _buffer
+
+
+def shutdown():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is not None:
+            _buffer.close()
+            _buffer = None
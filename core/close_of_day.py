@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import audit
+from .models import Absence, Attendance, CustomUser
+from .workcalendar import working_shift_ids
+
+POLICIES = ['close', 'credit', 'none']
+
+
+# ✅ One UPDATE closes every open session of the day (plus one SELECT for the audit trail)
+def close_open_sessions(day, policy, hours):
+    open_rows = Attendance.objects.filter(date=day, check_out__isnull=True)
+    if policy in ['credit', 'close']:
+        audit.record_many([
+            dict(audit.event('auto_checkout', None, user_id, date=day, policy=policy),
+                 object_type='attendance', object_id=pk)
+            for pk, user_id in open_rows.values_list('id', 'user_id')
+        ])
+    if policy == 'credit':
+        return open_rows.update(
+            check_out=F('check_in') + timedelta(hours=hours),
+            total_hours=round(hours, 2),
+            auto_closed=True,
+        )
+    if policy == 'close':
+        return open_rows.update(check_out=F('check_in'), total_hours=0.0, auto_closed=True)
+    return 0
+
+
+# ✅ One INSERT ... SELECT anti-join materializes the day's absences,
+# limited to users whose shift (or the default policy) works that day
+def insert_absences(day, roles):
+    shift_ids = working_shift_ids(day)
+    if not roles or not shift_ids:
+        return 0
+    users = CustomUser._meta.db_table
+    attendance = Attendance._meta.db_table
+    absence = Absence._meta.db_table
+    role_placeholders = ', '.join(['%s'] * len(roles))
+    shifts = [shift_id for shift_id in shift_ids if shift_id is not None]
+    shift_conditions = []
+    if None in shift_ids:
+        shift_conditions.append("u.shift_id IS NULL")
+    if shifts:
+        shift_conditions.append(f"u.shift_id IN ({', '.join(['%s'] * len(shifts))})")
+    sql = f"""
+        INSERT INTO {absence} (user_id, date, created_at)
+        SELECT u.id, %s, %s
+        FROM {users} u
+        WHERE u.is_active = %s
+          AND u.role IN ({role_placeholders})
+          AND ({' OR '.join(shift_conditions)})
+          AND NOT EXISTS (SELECT 1 FROM {attendance} a WHERE a.user_id = u.id AND a.date = %s)
+          AND NOT EXISTS (SELECT 1 FROM {absence} b WHERE b.user_id = u.id AND b.date = %s)
+    """
+    params = [day, timezone.now(), True, *roles, *shifts, day, day]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+# ✅ Safe to rerun: only open sessions are closed and existing absences are skipped;
+# weekly offs and holidays come from the work calendar
+def close_day(day, policy=None, hours=None, roles=None):
+    policy = policy or settings.AUTO_CHECKOUT_POLICY
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown auto check-out policy: {policy}")
+    hours = settings.AUTO_CHECKOUT_HOURS if hours is None else hours
+    roles = settings.CLOSE_OF_DAY_ROLES if roles is None else roles
+
+    with transaction.atomic():
+        closed = close_open_sessions(day, policy, hours)
+        absences = insert_absences(day, roles)
+    return {'date': day, 'policy': policy, 'closed': closed, 'absences': absences}
@@ -0,0 +1,288 @@
+import io
+import sys
+from array import array
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from .models import Attendance, CustomUser, RegularizationRequest
+
+# Optional dependencies: Arrow/Parquet via pyarrow, msgpack as the compact fallback
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+CHUNK_SIZE = 10000
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+EPOCH_DATE = date(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+ROLE_CODES = [role for role, _ in CustomUser.ROLE_CHOICES]
+STATUS_CODES = [s for s, _ in RegularizationRequest.STATUS_CHOICES]
+
+CONTENT_TYPES = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+    'msgpack': 'application/x-msgpack',
+}
+
+# ✅ Column kinds: (array typecode, encoder). Nullable kinds store 0 and clear the validity bit.
+KINDS = {
+    'int64': ('q', lambda v: v),
+    'float64': ('d', lambda v: v),
+    'bool': ('b', lambda v: int(v)),
+    'date': ('i', lambda v: (v - EPOCH_DATE).days),
+    'timestamp': ('q', lambda v: (v - EPOCH) // ONE_MICROSECOND),
+}
+
+# (name, values_list field, kind, extra). 'code' columns keep an index into a fixed category
+# list; 'names' columns are dictionary-encoded user names looked up from a user id field.
+DATASETS = {
+    'attendance': {
+        'queryset': lambda: Attendance.objects.order_by('id'),
+        'columns': [
+            ('id', 'id', 'int64', None),
+            ('user_id', 'user_id', 'int64', None),
+            ('user_name', 'user_id', 'names', None),
+            ('date', 'date', 'date', None),
+            ('check_in', 'check_in', 'timestamp', None),
+            ('check_out', 'check_out', 'timestamp', None),
+            ('total_hours', 'total_hours', 'float64', None),
+            ('auto_closed', 'auto_closed', 'bool', None),
+        ],
+    },
+    'regularizations': {
+        'queryset': lambda: RegularizationRequest.objects.order_by('id'),
+        'columns': [
+            ('id', 'id', 'int64', None),
+            ('user_id', 'user_id', 'int64', None),
+            ('user_name', 'user_id', 'names', None),
+            ('date', 'date', 'date', None),
+            ('reason', 'reason', 'string', None),
+            ('status', 'status', 'code', STATUS_CODES),
+            ('created_at', 'created_at', 'timestamp', None),
+            ('approved_by_id', 'approved_by_id', 'int64', None),
+            ('approved_by_name', 'approved_by_id', 'names', None),
+        ],
+    },
+    'users': {
+        'queryset': lambda: CustomUser.objects.order_by('id'),
+        'columns': [
+            ('id', 'id', 'int64', None),
+            ('email', 'email', 'string', None),
+            ('full_name', 'full_name', 'string', None),
+            ('role', 'role', 'code', ROLE_CODES),
+            ('manager_id', 'manager_id', 'int64', None),
+            ('is_active', 'is_active', 'bool', None),
+        ],
+    },
+}
+
+
+def available_formats():
+    formats = []
+    if pa is not None:
+        formats += ['arrow', 'parquet']
+    if msgpack is not None:
+        formats.append('msgpack')
+    return formats
+
+
+def _bitmap(flags):
+    # Arrow-style validity bitmap, least significant bit first
+    bits = bytearray((len(flags) + 7) // 8)
+    for i, valid in enumerate(flags):
+        if valid:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+
+def _user_dictionary():
+    names, positions = [], {}
+    for user_id, full_name in CustomUser.objects.order_by('id').values_list('id', 'full_name').iterator(CHUNK_SIZE):
+        positions[user_id] = len(names)
+        names.append(full_name)
+    return names, positions
+
+
+# ✅ Encode one chunk of rows into typed column buffers
+def _encode_chunk(rows, columns, positions):
+    encoded = []
+    for index, (name, _, kind, extra) in enumerate(columns):
+        values = [row[index] for row in rows]
+        valid = [v is not None for v in values]
+        has_nulls = not all(valid)
+        if kind == 'string':
+            data = values
+        elif kind == 'code':
+            # Values outside the category list (e.g. a role removed from the choices) export as null
+            lookup = {c: i for i, c in enumerate(extra)}
+            valid = [v in lookup for v in values]
+            has_nulls = not all(valid)
+            data = array('b', (lookup.get(v, 0) for v in values))
+        elif kind == 'names':
+            data = array('i', (positions.get(v, 0) if v is not None else 0 for v in values))
+        else:
+            typecode, encode = KINDS[kind]
+            data = array(typecode, (encode(v) if v is not None else 0 for v in values))
+        encoded.append((data, valid if has_nulls else None))
+    return encoded
+
+
+def _chunks(dataset):
+    spec = DATASETS[dataset]
+    fields = [field for _, field, _, _ in spec['columns']]
+    rows = []
+    for row in spec['queryset']().values_list(*fields).iterator(CHUNK_SIZE):
+        rows.append(row)
+        if len(rows) == CHUNK_SIZE:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+# ✅ Arrow / Parquet
+def _arrow_schema(columns):
+    types = {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'bool': pa.bool_(),
+        'date': pa.date32(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+        'string': pa.string(),
+        'code': pa.dictionary(pa.int8(), pa.string()),
+        'names': pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([pa.field(name, types[kind]) for name, _, kind, _ in columns])
+
+
+def _mask(valid):
+    return None if valid is None else pa.array([not v for v in valid], pa.bool_())
+
+
+def _arrow_batch(schema, columns, encoded, names_array):
+    arrays = []
+    for (name, _, kind, extra), (data, valid), field in zip(columns, encoded, schema):
+        length = len(data)
+        validity = pa.py_buffer(_bitmap(valid)) if valid is not None else None
+        if kind == 'string':
+            arrays.append(pa.array(data, pa.string()))
+        elif kind == 'bool':
+            arrays.append(pa.array([bool(v) for v in data], pa.bool_(), mask=_mask(valid)))
+        elif kind in ['code', 'names']:
+            index_type = pa.int8() if kind == 'code' else pa.int32()
+            indices = pa.Array.from_buffers(index_type, length, [validity, pa.py_buffer(data)])
+            dictionary = pa.array(extra, pa.string()) if kind == 'code' else names_array
+            arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+        else:
+            arrays.append(pa.Array.from_buffers(field.type, length, [validity, pa.py_buffer(data)]))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file that hands back what was written since the last take()
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+
+# ✅ Yields bytes batch by batch: an IPC message (or a Parquet row group) per chunk of
+# rows, so memory stays at one chunk plus the user-name dictionary
+def _export_arrow(dataset, fmt):
+    columns = DATASETS[dataset]['columns']
+    names, positions = _user_dictionary()
+    names_array = pa.array(names, pa.string())
+    schema = _arrow_schema(columns)
+
+    sink = _ChunkSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for rows in _chunks(dataset):
+        writer.write_batch(_arrow_batch(schema, columns, _encode_chunk(rows, columns, positions), names_array))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+# ✅ msgpack fallback: one typed buffer per column plus validity bitmaps. Each column is
+# a single contiguous buffer, so the whole export is built in memory before it is sent
+# (roughly the row count times the encoded row width); use arrow or parquet for large tables.
+def _typecode(kind):
+    return {'code': 'b', 'names': 'i'}.get(kind) or KINDS[kind][0]
+
+
+def _export_msgpack(dataset):
+    columns = DATASETS[dataset]['columns']
+    names, positions = _user_dictionary()
+    buffers = [[] if kind == 'string' else array(_typecode(kind)) for _, _, kind, _ in columns]
+    validity = [None] * len(columns)
+    count = 0
+
+    for rows in _chunks(dataset):
+        for i, (data, valid) in enumerate(_encode_chunk(rows, columns, positions)):
+            buffers[i].extend(data)
+            if valid is not None and validity[i] is None:
+                validity[i] = [True] * count
+            if validity[i] is not None:
+                validity[i].extend(valid if valid is not None else [True] * len(rows))
+        count += len(rows)
+
+    out = []
+    for (name, _, kind, extra), data, valid in zip(columns, buffers, validity):
+        column = {'name': name, 'type': kind}
+        if kind == 'string':
+            column['data'] = data
+        else:
+            column['dtype'] = data.typecode
+            column['data'] = data.tobytes()
+        if kind == 'code':
+            column['categories'] = extra
+        if kind == 'names':
+            column['dictionary'] = 'user_names'
+        column['validity'] = _bitmap(valid) if valid is not None else None
+        out.append(column)
+
+    return msgpack.packb({
+        'dataset': dataset,
+        'rows': count,
+        'byteorder': sys.byteorder,
+        'timestamp_unit': 'us',
+        'date_unit': 'days',
+        'dictionaries': {'user_names': names},
+        'columns': out,
+    }, use_bin_type=True)
+
+
+# ✅ Validates up front and returns an iterable of byte chunks for a streaming response
+def export_dataset(dataset, fmt):
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}'")
+    if fmt not in available_formats():
+        raise ValueError(f"Format '{fmt}' is not available (installed: {', '.join(available_formats()) or 'none'})")
+    if fmt == 'msgpack':
+        return [_export_msgpack(dataset)]
+    return _export_arrow(dataset, fmt)
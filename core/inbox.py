@@ -0,0 +1,91 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import InboxCounter, RegularizationRequest
+
+
+# ✅ Which inboxes a request shows up in (mirrors can_approve and the list views)
+def keys_for_requester(role, manager_id):
+    keys = ['admin']
+    if role == 'employee':
+        keys.append('hr')
+    if manager_id:
+        keys.append(f"manager:{manager_id}")
+    return keys
+
+
+def keys_for_request(reg):
+    return keys_for_requester(reg.user.role, reg.user.manager_id)
+
+
+def key_for_approver(user):
+    if user.role in ['admin', 'hr']:
+        return user.role
+    return f"manager:{user.id}"
+
+
+def _bump(key, delta):
+    if InboxCounter.objects.filter(key=key).update(pending=F('pending') + delta):
+        return
+    try:
+        with transaction.atomic():
+            InboxCounter.objects.create(key=key, pending=delta)
+    except IntegrityError:
+        InboxCounter.objects.filter(key=key).update(pending=F('pending') + delta)
+
+
+# ✅ Call inside the transaction that creates / resolves the request
+def request_created(reg):
+    for key in keys_for_request(reg):
+        _bump(key, 1)
+
+
+def request_resolved(reg):
+    for key in keys_for_request(reg):
+        _bump(key, -1)
+
+
+# ✅ A requester changed role or manager: their pending requests move to the new inboxes.
+# Call inside the transaction that saves the user (CustomUser.save does).
+def requester_moved(user, old_role, old_manager_id):
+    old_keys = set(keys_for_requester(old_role, old_manager_id))
+    new_keys = set(keys_for_requester(user.role, user.manager_id))
+    if old_keys == new_keys:
+        return
+    pending = RegularizationRequest.objects.filter(user=user, status='pending').count()
+    if not pending:
+        return
+    for key in old_keys - new_keys:
+        _bump(key, -pending)
+    for key in new_keys - old_keys:
+        _bump(key, pending)
+
+
+def pending_count(user):
+    count = InboxCounter.objects.filter(key=key_for_approver(user)).values_list('pending', flat=True).first()
+    return max(count or 0, 0)
+
+
+def pending_requests(user):
+    queryset = RegularizationRequest.objects.filter(status='pending')
+    if user.role == 'hr':
+        queryset = queryset.filter(user__role='employee')
+    elif user.role != 'admin':
+        queryset = queryset.filter(user__manager=user)
+    return queryset.select_related('user', 'approved_by').order_by('created_at')
+
+
+# ✅ Recompute every counter from the table (after bulk QuerySet.update() reassignments or drift)
+def rebuild_counters():
+    pending = RegularizationRequest.objects.filter(status='pending')
+    counts = {
+        'admin': pending.count(),
+        'hr': pending.filter(user__role='employee').count(),
+    }
+    for row in pending.filter(user__manager__isnull=False).values('user__manager_id').annotate(n=Count('id')):
+        counts[f"manager:{row['user__manager_id']}"] = row['n']
+
+    with transaction.atomic():
+        InboxCounter.objects.all().delete()
+        InboxCounter.objects.bulk_create([InboxCounter(key=key, pending=n) for key, n in counts.items()])
+    return counts
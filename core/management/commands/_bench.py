@@ -0,0 +1,55 @@
+# Shared helpers for the bench_* management commands (not a command itself)
+import statistics
+
+from django.contrib.auth.hashers import make_password
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import CustomUser
+
+BENCH_DOMAIN = 'bench.local'
+BENCH_PASSWORD = 'Bench-Passw0rd!'
+
+
+def create_bench_users(prefix, count, role='employee', manager=None):
+    hashed = make_password(BENCH_PASSWORD)
+    users = [
+        CustomUser(
+            email=f"{prefix}-{i}@{BENCH_DOMAIN}",
+            full_name=f"Bench {prefix} {i}",
+            role=role,
+            manager=manager,
+            password=hashed,
+        )
+        for i in range(count)
+    ]
+    CustomUser.objects.bulk_create(users, batch_size=500)
+    return list(CustomUser.objects.filter(email__startswith=f"{prefix}-", email__endswith=BENCH_DOMAIN).order_by('id'))
+
+
+def delete_bench_users(prefix):
+    CustomUser.objects.filter(email__startswith=f"{prefix}-", email__endswith=BENCH_DOMAIN).delete()
+
+
+def bearer(user):
+    return f"Bearer {RefreshToken.for_user(user).access_token}"
+
+
+def summarize(samples):
+    # Latencies in seconds -> p50/p95/max in milliseconds
+    if not samples:
+        return {'n': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        'n': len(ordered),
+        'p50_ms': round(statistics.median(ordered) * 1000, 2),
+        'p95_ms': round(p95 * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def format_row(label, stats):
+    return (
+        f"{label:<28} n={stats['n']:<5} p50={stats['p50_ms']:>9.2f}ms "
+        f"p95={stats['p95_ms']:>9.2f}ms max={stats['max_ms']:>9.2f}ms"
+    )
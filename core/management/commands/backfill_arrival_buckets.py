@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils.dateparse import parse_date
+
+from core.analytics import backfill_arrivals
+from core.models import Attendance
+
+
+class Command(BaseCommand):
+    help = "Rebuild the 5-minute arrival buckets from Attendance, one month at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help="First date (YYYY-MM-DD), defaults to the oldest attendance")
+        parser.add_argument('--to', dest='end', help="Last date (YYYY-MM-DD), defaults to the newest attendance")
+
+    def handle(self, *args, **options):
+        bounds = Attendance.objects.aggregate(first=Min('date'), last=Max('date'))
+        dates = {}
+        for name, flag in [('start', '--from'), ('end', '--to')]:
+            if options[name]:
+                try:
+                    dates[name] = parse_date(options[name])
+                except ValueError:
+                    dates[name] = None
+                if dates[name] is None:
+                    raise CommandError(f"{flag} must be a valid YYYY-MM-DD date")
+        start = dates.get('start') or bounds['first']
+        end = dates.get('end') or bounds['last']
+        if not start or not end:
+            self.stdout.write("Nothing to backfill.")
+            return
+        if start > end:
+            raise CommandError("--from must not be after --to")
+
+        total = 0
+        chunk_start = start
+        while chunk_start <= end:
+            next_month = date(chunk_start.year + chunk_start.month // 12, chunk_start.month % 12 + 1, 1)
+            chunk_end = min(end, next_month - timedelta(days=1))
+            created = backfill_arrivals(chunk_start, chunk_end)
+            total += created
+            self.stdout.write(f"{chunk_start} → {chunk_end}: {created} buckets")
+            chunk_start = next_month
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Backfilled {total} buckets"))
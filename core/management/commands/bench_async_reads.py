@@ -0,0 +1,118 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.utils.timezone import localdate, make_aware
+
+from core.models import Attendance, RegularizationRequest
+
+from ._bench import bearer, create_bench_users, delete_bench_users, format_row, summarize
+
+PREFIX = 'bench-reads'
+
+# (label, sync url, async url, which token)
+ENDPOINTS = [
+    ('employee attendance', '/api/employee/attendance/', '/api/employee/attendance/async/', 'employee'),
+    ('team attendance', '/api/manager/attendance/', '/api/manager/attendance/async/', 'manager'),
+    ('my regularizations', '/api/employee/my-regularizations/', '/api/employee/my-regularizations/async/', 'employee'),
+    ('hr summary', '/api/hr/summary/', '/api/hr/summary/async/', 'hr'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent read throughput: sync views on threaded WSGI, sync views under ASGI, "
+        "and the async views under ASGI. Creates and removes its own users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint and mode")
+        parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight at once")
+        parser.add_argument('--employees', type=int, default=10, help="Employees in the bench team")
+        parser.add_argument('--days', type=int, default=20, help="Attendance days per employee")
+
+    def handle(self, *args, **options):
+        delete_bench_users(PREFIX)
+        manager = create_bench_users(f"{PREFIX}-mgr", 1, role='manager')[0]
+        hr = create_bench_users(f"{PREFIX}-hr", 1, role='hr')[0]
+        employees = create_bench_users(PREFIX, options['employees'], manager=manager)
+        try:
+            self._seed(employees, options['days'])
+            tokens = {'employee': bearer(employees[0]), 'manager': bearer(manager), 'hr': bearer(hr)}
+
+            # Measure the views, not the per-IP throttles or load shedding
+            with override_settings(THROTTLE_ENABLED=False, LOAD_SHED_LIMITS=None):
+                for label, sync_url, async_url, role in ENDPOINTS:
+                    self.stdout.write(label)
+                    self._check_parity(label, sync_url, async_url, tokens[role])
+                    for mode, run in [
+                        ('  wsgi threads, sync views', lambda: self._wsgi(sync_url, tokens[role], options)),
+                        ('  asgi, sync views', lambda: asyncio.run(self._asgi(sync_url, tokens[role], options))),
+                        ('  asgi, async views', lambda: asyncio.run(self._asgi(async_url, tokens[role], options))),
+                    ]:
+                        latencies, seconds = run()
+                        self.stdout.write(
+                            format_row(mode, summarize(latencies))
+                            + f"  {len(latencies) / seconds:>7.1f} req/s"
+                        )
+        finally:
+            delete_bench_users(f"{PREFIX}-mgr")
+            delete_bench_users(f"{PREFIX}-hr")
+            delete_bench_users(PREFIX)
+
+    def _seed(self, employees, days):
+        today = localdate()
+        rows, regs = [], []
+        for user in employees:
+            for offset in range(days):
+                day = today - timedelta(days=offset)
+                check_in = make_aware(datetime.combine(day, dtime(9, 30 + offset % 50 // 2)))
+                rows.append(Attendance(
+                    user=user, date=day, check_in=check_in, team=user.manager_id or 0,
+                    check_out=check_in + timedelta(hours=9), total_hours=9.0,
+                ))
+                if offset % 5 == 0:
+                    regs.append(RegularizationRequest(
+                        user=user, date=day, reason='Bench', status='approved' if offset % 10 else 'pending',
+                    ))
+        Attendance.objects.bulk_create(rows, batch_size=1000)
+        RegularizationRequest.objects.bulk_create(regs, batch_size=1000)
+
+    def _check_parity(self, label, sync_url, async_url, token):
+        client = Client(headers={'host': 'localhost'})
+        expected = client.get(sync_url, headers={'authorization': token})
+        actual = asyncio.run(AsyncClient(headers={'host': 'localhost'}).get(async_url, headers={'authorization': token}))
+        if expected.status_code != actual.status_code or json.loads(expected.content) != json.loads(actual.content):
+            self.stderr.write(f"{label}: async response differs from the sync view")
+
+    def _wsgi(self, url, token, options):
+        client = Client(headers={'host': 'localhost'})
+
+        def request():
+            started = time.perf_counter()
+            client.get(url, headers={'authorization': token})
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            latencies = list(pool.map(lambda _: request(), range(options['requests'])))
+        return latencies, time.perf_counter() - started
+
+    async def _asgi(self, url, token, options):
+        client = AsyncClient(headers={'host': 'localhost'})
+        slots = asyncio.Semaphore(options['concurrency'])
+        latencies = []
+
+        async def request():
+            async with slots:
+                started = time.perf_counter()
+                await client.get(url, headers={'authorization': token})
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[request() for _ in range(options['requests'])])
+        return latencies, time.perf_counter() - started
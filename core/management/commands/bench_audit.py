@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import audit
+from core.models import AuditEvent
+
+from ._bench import format_row, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark per-event cost on the request path: a synchronous audit INSERT "
+        "against queueing into the buffered audit log. Removes the events it writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=2000, help="Events per mode")
+
+    def handle(self, *args, **options):
+        started_at = audit.now()
+        count = options['events']
+        try:
+            sync_latencies = []
+            for i in range(count):
+                started = time.perf_counter()
+                AuditEvent.objects.create(**audit.event('checkin', i, i, bench=True))
+                sync_latencies.append(time.perf_counter() - started)
+
+            buffered_latencies = []
+            for i in range(count):
+                started = time.perf_counter()
+                audit.record('checkin', i, i, bench=True)
+                buffered_latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            audit.flush()
+            flush_seconds = time.perf_counter() - started
+
+            self.stdout.write(format_row('sync INSERT per event', summarize(sync_latencies)))
+            self.stdout.write(format_row('buffered record()', summarize(buffered_latencies)))
+            self.stdout.write(f"background flush of the rest: {flush_seconds * 1000:.1f}ms")
+        finally:
+            audit.flush()
+            AuditEvent.objects.filter(occurred_at__gte=started_at, details__bench=True).delete()
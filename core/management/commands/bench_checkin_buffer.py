@@ -0,0 +1,67 @@
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from core import checkin_buffer
+from core.models import Attendance
+
+from ._bench import bearer, create_bench_users, delete_bench_users, format_row, summarize
+
+PREFIX = 'bench-checkin'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark check-in throughput with direct Attendance writes vs the write-behind "
+        "buffer (CHECKIN_WRITE_BEHIND). Creates and removes its own users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500, help="Check-ins per phase (one per user)")
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent request threads")
+
+    @override_settings(THROTTLE_ENABLED=False)  # Every check-in comes from one test IP
+    def handle(self, *args, **options):
+        delete_bench_users(PREFIX)
+        users = create_bench_users(PREFIX, options['users'])
+        tokens = [bearer(u) for u in users]
+        try:
+            Attendance.objects.filter(user__in=users).delete()
+            stats, seconds = self._run(tokens, options['threads'])
+            self.stdout.write(format_row('direct writes', stats) + f"  {len(tokens) / seconds:>8.1f} req/s")
+
+            Attendance.objects.filter(user__in=users).delete()
+            # The first phase's punches are still in the today-status cache
+            caches[settings.TODAY_STATUS_CACHE].clear()
+            with tempfile.TemporaryDirectory() as log_dir, \
+                    override_settings(CHECKIN_WRITE_BEHIND=True, CHECKIN_LOG_DIR=log_dir):
+                stats, seconds = self._run(tokens, options['threads'])
+                started = time.perf_counter()
+                checkin_buffer.shutdown()  # Final flush
+                drain = time.perf_counter() - started
+            stored = Attendance.objects.filter(user__in=users).count()
+            self.stdout.write(
+                format_row('write-behind (ack)', stats) + f"  {len(tokens) / seconds:>8.1f} req/s"
+                f"  drain={drain * 1000:.1f}ms stored={stored}/{len(tokens)}"
+            )
+        finally:
+            checkin_buffer.shutdown()
+            delete_bench_users(PREFIX)
+
+    def _run(self, tokens, threads):
+        def check_in(token):
+            client = Client(headers={'host': 'localhost'})
+            started = time.perf_counter()
+            response = client.post('/api/employee/checkin/', headers={'authorization': token})
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            latencies = list(pool.map(check_in, tokens))
+        return summarize(latencies), time.perf_counter() - started
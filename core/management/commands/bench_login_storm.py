@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+
+from core.models import Attendance
+
+from ._bench import BENCH_PASSWORD, bearer, create_bench_users, delete_bench_users, format_row, summarize
+
+PREFIX = 'bench-login'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark check-in latency during a login storm, through the ASGI handler, "
+        "against the sync LoginView and the async login view. Creates and removes its own users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=40, help="Concurrent logins in the storm")
+        parser.add_argument('--probes', type=int, default=20, help="Check-ins measured per phase")
+        parser.add_argument('--interval', type=float, default=0.05, help="Seconds between probe check-ins")
+
+    def handle(self, *args, **options):
+        delete_bench_users(PREFIX)
+        users = create_bench_users(PREFIX, options['probes'] + 1)
+        try:
+            login_user, probe_users = users[0], users[1:]
+            tokens = [bearer(u) for u in probe_users]
+            results = {}
+            for label, login_url in [
+                ('check-in, no storm', None),
+                ('check-in, sync login storm', '/api/login/'),
+                ('check-in, async login storm', '/api/login/async/'),
+            ]:
+                Attendance.objects.filter(user__in=probe_users).delete()
+                caches[settings.TODAY_STATUS_CACHE].clear()  # Forget the previous phase's punches
+                # Measure the login path itself, not the per-IP login throttle
+                with override_settings(THROTTLE_ENABLED=False):
+                    results[label] = asyncio.run(self._phase(login_user.email, login_url, tokens, options))
+            for label, (probe_stats, storm_seconds) in results.items():
+                line = format_row(label, probe_stats)
+                if storm_seconds:
+                    line += f"  storm={storm_seconds:.2f}s"
+                self.stdout.write(line)
+        finally:
+            delete_bench_users(PREFIX)
+
+    async def _phase(self, email, login_url, tokens, options):
+        client = AsyncClient(headers={'host': 'localhost'})
+        latencies = []
+
+        async def storm():
+            if not login_url:
+                return 0.0
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                client.post(login_url, {'email': email, 'password': BENCH_PASSWORD}, content_type='application/json')
+                for _ in range(options['logins'])
+            ])
+            return time.perf_counter() - started
+
+        async def probes():
+            # Give the storm a head start so probes land while it is queued
+            await asyncio.sleep(options['interval'])
+            for token in tokens:
+                started = time.perf_counter()
+                await client.post('/api/employee/checkin/', headers={'authorization': token})
+                latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(options['interval'])
+
+        storm_seconds, _ = await asyncio.gather(storm(), probes())
+        return summarize(latencies), storm_seconds
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from core import throttling
+from core.models import Attendance
+
+from ._bench import bearer, create_bench_users, delete_bench_users, format_row, summarize
+
+PREFIX = 'bench-throttle'
+
+
+class Command(BaseCommand):
+    help = (
+        "Show that check-in latency for normal users holds while a misbehaving client "
+        "hammers the endpoint, with throttling off vs on. Creates and removes its own users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--abusers', type=int, default=6, help="Threads retrying check-in in a loop")
+        parser.add_argument('--probes', type=int, default=40, help="Normal check-ins measured per phase")
+
+    def handle(self, *args, **options):
+        delete_bench_users(PREFIX)
+        users = create_bench_users(PREFIX, 1 + 2 * options['probes'])
+        try:
+            abuser, probes = users[0], users[1:]
+            abuser_token = bearer(abuser)
+            phases = [
+                ('no abuse', False, False, probes[:options['probes']]),
+                ('abuse, throttling off', True, False, probes[:options['probes']]),
+                ('abuse, throttling on', True, True, probes[options['probes']:]),
+            ]
+            for label, abuse, throttled, phase_users in phases:
+                Attendance.objects.filter(user__in=users).delete()
+                caches[settings.TODAY_STATUS_CACHE].clear()  # Forget the previous phase's punches
+                throttling._backend = None  # Fresh buckets per phase
+                with override_settings(THROTTLE_ENABLED=throttled):
+                    stats, counts = self._phase(
+                        abuser_token if abuse else None, [bearer(u) for u in phase_users], options['abusers']
+                    )
+                line = format_row(label, stats)
+                if abuse:
+                    line += f"  abuser: {counts.get(429, 0)} throttled / {sum(counts.values())} requests"
+                self.stdout.write(line)
+        finally:
+            delete_bench_users(PREFIX)
+
+    def _phase(self, abuser_token, probe_tokens, abusers):
+        stop = threading.Event()
+        counts = {}
+        counts_lock = threading.Lock()
+
+        def abuse():
+            client = Client(headers={'host': 'localhost'}, REMOTE_ADDR='10.0.0.66')
+            while not stop.is_set():
+                response = client.post('/api/employee/checkin/', headers={'authorization': abuser_token})
+                with counts_lock:
+                    counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+        threads = [threading.Thread(target=abuse) for _ in range(abusers if abuser_token else 0)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+
+        client = Client(headers={'host': 'localhost'}, REMOTE_ADDR='10.0.0.1')
+        latencies = []
+        for token in probe_tokens:
+            started = time.perf_counter()
+            client.post('/api/employee/checkin/', headers={'authorization': token})
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return summarize(latencies), counts
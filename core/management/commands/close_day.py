@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from django.utils.timezone import localdate
+
+from core.close_of_day import POLICIES, close_day
+
+
+class Command(BaseCommand):
+    help = "Nightly batch: auto check-out open sessions and record absences (defaults to yesterday)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Day to close (YYYY-MM-DD), defaults to yesterday")
+        parser.add_argument('--policy', choices=POLICIES, help="Overrides AUTO_CHECKOUT_POLICY")
+        parser.add_argument('--hours', type=float, help="Overrides AUTO_CHECKOUT_HOURS for the 'credit' policy")
+
+    def handle(self, *args, **options):
+        try:
+            day = parse_date(options['date']) if options['date'] else localdate() - timedelta(days=1)
+        except ValueError:
+            day = None
+        if day is None:
+            raise CommandError("--date must be a valid YYYY-MM-DD date")
+        if day >= localdate():
+            raise CommandError("Only past days can be closed.")
+
+        result = close_day(day, policy=options['policy'], hours=options['hours'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['date']}: closed {result['closed']} open sessions ({result['policy']}), "
+            f"recorded {result['absences']} absences"
+        ))
@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk_import import import_users, parse_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import users from a CSV or JSON file (email, full_name, role, password, manager_email)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a .csv or .json file")
+        parser.add_argument('--format', choices=['csv', 'json'], help="Defaults to the file extension")
+        parser.add_argument('--workers', type=int, default=None, help="Password hashing processes")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, insert nothing")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+        fmt = options['format'] or path.suffix.lstrip('.').lower()
+
+        try:
+            rows = parse_rows(path.read_bytes(), fmt)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = import_users(rows, workers=options['workers'], dry_run=options['dry_run'])
+
+        if report['errors']:
+            self.stderr.write(json.dumps(report['errors'], indent=2))
+            raise CommandError(f"{len(report['errors'])} of {report['total']} rows failed validation; nothing imported.")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"✅ {report['total']} rows valid"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Imported {report['created']} users"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.audit import ensure_partitions, purge_before
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming monthly audit partitions (Postgres) and optionally purge "
+        "whole months of audit events older than --purge-before."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3, help="Months of partitions to keep ready, from this one")
+        parser.add_argument('--purge-before', help="Drop events from months before this date (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        purge = None
+        if options['purge_before']:
+            try:
+                purge = parse_date(options['purge_before'])
+            except ValueError:
+                purge = None
+            if purge is None:
+                raise CommandError("--purge-before must be a valid YYYY-MM-DD date")
+
+        created = ensure_partitions(options['ahead'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Created partitions: {', '.join(map(str, created))}" if created else "✅ Partitions up to date"
+        ))
+        if purge:
+            self.stdout.write(self.style.SUCCESS(f"✅ Purged {purge_before(purge)} audit events"))
@@ -0,0 +1,72 @@
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import FOLDED_SUFFIX, read_profile
+
+
+class Command(BaseCommand):
+    help = "Aggregate request profiles from PROFILING_DIR into per-view hot-path reports."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help="Profile directory, defaults to PROFILING_DIR")
+        parser.add_argument('--view', help="Only report this view name")
+        parser.add_argument('--top', type=int, default=10, help="Frames and paths listed per view")
+        parser.add_argument('--folded-out', help="Also write one merged .folded file per view here")
+
+    def handle(self, *args, **options):
+        directory = Path(options['dir'] or settings.PROFILING_DIR)
+        if not directory.is_dir():
+            raise CommandError(f"No profiles in {directory}")
+
+        views = defaultdict(lambda: {'requests': 0, 'duration_ms': 0.0, 'queries': 0, 'samples': Counter()})
+        for path in sorted(directory.glob(f"*{FOLDED_SUFFIX}")):
+            meta, samples = read_profile(path)
+            view = meta.get('view', 'unresolved')
+            if options['view'] and view != options['view']:
+                continue
+            stats = views[view]
+            stats['requests'] += 1
+            stats['duration_ms'] += float(meta.get('duration_ms', 0))
+            stats['queries'] += int(meta.get('queries', 0))
+            stats['samples'].update(samples)
+
+        if not views:
+            self.stdout.write("No matching profiles.")
+            return
+
+        top = options['top']
+        for view, stats in sorted(views.items(), key=lambda item: -item[1]['duration_ms']):
+            samples = stats['samples']
+            total = sum(samples.values()) or 1
+            inclusive, leaf = Counter(), Counter()
+            for stack, count in samples.items():
+                frames = stack.split(';')
+                leaf[frames[-1]] += count
+                for frame in set(frames):
+                    inclusive[frame] += count
+
+            n = stats['requests']
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{view}: {n} requests, avg {stats['duration_ms'] / n:.1f}ms, "
+                f"avg {stats['queries'] / n:.1f} queries, {total} samples"
+            ))
+            self.stdout.write("  Self time:")
+            for frame, count in leaf.most_common(top):
+                self.stdout.write(f"    {100 * count / total:5.1f}%  {frame}")
+            self.stdout.write("  Inclusive time:")
+            for frame, count in inclusive.most_common(top):
+                self.stdout.write(f"    {100 * count / total:5.1f}%  {frame}")
+            self.stdout.write("  Hot paths:")
+            for stack, count in samples.most_common(min(top, 5)):
+                tail = ' → '.join(stack.split(';')[-4:])
+                self.stdout.write(f"    {100 * count / total:5.1f}%  … {tail}")
+
+            if options['folded_out']:
+                out = Path(options['folded_out'])
+                out.mkdir(parents=True, exist_ok=True)
+                with open(out / f"{view.replace(':', '_')}{FOLDED_SUFFIX}", 'w') as f:
+                    for stack, count in samples.most_common():
+                        f.write(f"{stack} {count}\n")
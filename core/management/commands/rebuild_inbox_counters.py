@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.inbox import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the approver inbox pending counters from RegularizationRequest."
+
+    def handle(self, *args, **options):
+        counts = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {len(counts)} inbox counters ({counts['admin']} pending requests)"
+        ))
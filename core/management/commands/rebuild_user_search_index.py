@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_index, uses_postgres
+
+
+class Command(BaseCommand):
+    help = "Rebuild the fallback trigram table used by user search (not needed on Postgres)."
+
+    def handle(self, *args, **options):
+        if uses_postgres():
+            self.stdout.write("Postgres uses pg_trgm GIN indexes; nothing to rebuild.")
+            return
+        total = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {total} users"))
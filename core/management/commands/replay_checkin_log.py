@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.checkin_buffer import CheckInBuffer
+
+
+class Command(BaseCommand):
+    help = "Write check-ins left in the write-behind logs of crashed workers to Attendance."
+
+    def handle(self, *args, **options):
+        # Opening a buffer replays every unlocked log; then flush and close our own
+        buffer = CheckInBuffer(settings.CHECKIN_LOG_DIR, settings.CHECKIN_FLUSH_INTERVAL)
+        buffer.close()
+        self.stdout.write(self.style.SUCCESS(f"✅ Replayed {buffer.recovered} buffered check-ins"))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_customuser_options_alter_customuser_managers_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='full_name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.CreateModel(
+            name='ArrivalBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team', models.BigIntegerField(default=0)),
+                ('date', models.DateField()),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'team'], name='arrival_date_team_idx')],
+                'constraints': [models.UniqueConstraint(fields=('team', 'date', 'bucket'), name='unique_arrival_bucket')],
+            },
+        ),
+    ]
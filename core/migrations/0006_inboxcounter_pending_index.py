@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_counters(apps, schema_editor):
+    RegularizationRequest = apps.get_model('core', 'RegularizationRequest')
+    InboxCounter = apps.get_model('core', 'InboxCounter')
+
+    pending = RegularizationRequest.objects.filter(status='pending')
+    counters = [
+        InboxCounter(key='admin', pending=pending.count()),
+        InboxCounter(key='hr', pending=pending.filter(user__role='employee').count()),
+    ]
+    for row in pending.filter(user__manager__isnull=False).values('user__manager_id').annotate(n=Count('id')):
+        counters.append(InboxCounter(key=f"manager:{row['user__manager_id']}", pending=row['n']))
+    InboxCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_arrivalbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('pending', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='regularizationrequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='reg_pending_created_idx'),
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:51
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_attendance_date_localdate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Shift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('start_time', models.TimeField(default=datetime.time(9, 0))),
+                ('late_after', models.TimeField(default=datetime.time(10, 6))),
+                ('end_time', models.TimeField(default=datetime.time(18, 0))),
+                ('min_hours', models.FloatField(default=9.0)),
+                ('weekly_off', models.PositiveSmallIntegerField(default=96)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('name', models.CharField(max_length=100)),
+                ('shift', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='core.shift')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='shift',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='core.shift'),
+        ),
+    ]
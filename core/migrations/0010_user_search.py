@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:51
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Plain columns serve the % (trigram_similar) operator; the UPPER(...) expressions
+# match what Django emits for icontains, so substring search is indexed too
+TRGM_INDEXES = [
+    ('core_customuser_email_trgm', 'email'),
+    ('core_customuser_full_name_trgm', 'full_name'),
+    ('core_customuser_email_upper_trgm', '(UPPER(email::text))'),
+    ('core_customuser_full_name_upper_trgm', '(UPPER(full_name::text))'),
+]
+
+
+def _trigrams(text):
+    grams = set()
+    for word in re.findall(r'[^\W_]+', (text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        table = apps.get_model('core', 'CustomUser')._meta.db_table
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, expression in TRGM_INDEXES:
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({expression} gin_trgm_ops)"
+            )
+        return
+
+    # Portable fallback: fill the trigram table for existing users
+    CustomUser = apps.get_model('core', 'CustomUser')
+    UserSearchGram = apps.get_model('core', 'UserSearchGram')
+    rows = []
+    for user_id, email, full_name in CustomUser.objects.values_list('id', 'email', 'full_name').iterator():
+        for field, text in [(0, email), (1, full_name)]:
+            grams = _trigrams(text)
+            rows.extend(UserSearchGram(user_id=user_id, field=field, gram=g, total=len(grams)) for g in grams)
+    UserSearchGram.objects.bulk_create(rows, batch_size=1000)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, _ in TRGM_INDEXES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_shift_holiday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.PositiveSmallIntegerField()),
+                ('gram', models.CharField(max_length=3)),
+                ('total', models.PositiveSmallIntegerField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_grams', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gram', 'user'], name='user_search_gram_idx')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:09
+
+import django.core.serializers.json
+from django.db import migrations, models
+from django.utils.timezone import localdate
+
+# On Postgres the table is declared partitioned by month (YYYYMM); the primary key must
+# include the partition key. Rows outside every monthly partition land in the default one.
+POSTGRES_TABLE = """
+    CREATE TABLE core_auditevent (
+        id bigint GENERATED BY DEFAULT AS IDENTITY,
+        month integer NOT NULL CHECK (month >= 0),
+        occurred_at timestamp with time zone NOT NULL,
+        action varchar(20) NOT NULL,
+        actor bigint NULL,
+        subject bigint NULL,
+        object_type varchar(40) NOT NULL,
+        object_id bigint NULL,
+        details jsonb NOT NULL,
+        PRIMARY KEY (id, month)
+    ) PARTITION BY RANGE (month)
+"""
+POSTGRES_INDEXES = [
+    ('audit_actor_idx', 'actor, occurred_at'),
+    ('audit_subject_idx', 'subject, occurred_at'),
+    ('audit_time_idx', 'occurred_at'),
+]
+INITIAL_MONTHS = 3
+
+
+def _next_month(key):
+    year, month = divmod(key, 100)
+    return (year + 1) * 100 + 1 if month == 12 else key + 1
+
+
+def create_audit_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(apps.get_model('core', 'AuditEvent'))
+        return
+
+    schema_editor.execute(POSTGRES_TABLE)
+    schema_editor.execute("CREATE TABLE core_auditevent_default PARTITION OF core_auditevent DEFAULT")
+    for name, columns in POSTGRES_INDEXES:
+        schema_editor.execute(f"CREATE INDEX {name} ON core_auditevent ({columns})")
+    today = localdate()
+    key = today.year * 100 + today.month
+    for _ in range(INITIAL_MONTHS):
+        schema_editor.execute(
+            f"CREATE TABLE core_auditevent_p{key} PARTITION OF core_auditevent "
+            f"FOR VALUES FROM ({key}) TO ({_next_month(key)})"
+        )
+        key = _next_month(key)
+
+
+def drop_audit_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model('core', 'AuditEvent'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_user_search'),
+    ]
+
+    operations = [
+        # The table itself is created below, partitioned where the database supports it
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='AuditEvent',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('month', models.PositiveIntegerField()),
+                        ('occurred_at', models.DateTimeField()),
+                        ('action', models.CharField(choices=[('checkin', 'Check-in'), ('checkout', 'Check-out'), ('auto_checkout', 'Automatic check-out'), ('approve', 'Regularization approved'), ('reject', 'Regularization rejected'), ('user_create', 'User created'), ('user_update', 'User updated'), ('user_import', 'User imported')], max_length=20)),
+                        ('actor', models.BigIntegerField(blank=True, null=True)),
+                        ('subject', models.BigIntegerField(blank=True, null=True)),
+                        ('object_type', models.CharField(blank=True, max_length=40)),
+                        ('object_id', models.BigIntegerField(blank=True, null=True)),
+                        ('details', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['actor', 'occurred_at'], name='audit_actor_idx'), models.Index(fields=['subject', 'occurred_at'], name='audit_subject_idx'), models.Index(fields=['occurred_at'], name='audit_time_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_audit_table, drop_audit_table),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:17
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_sessions(apps, schema_editor):
+    # Keep the first row of any (user, date) that was double-written before the constraint
+    Attendance = apps.get_model('core', 'Attendance')
+    duplicates = (
+        Attendance.objects.values('user_id', 'date')
+        .annotate(rows=Count('id'), keep=Min('id'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        Attendance.objects.filter(user_id=row['user_id'], date=row['date']).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_auditevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_attendance_per_day'),
+        ),
+    ]
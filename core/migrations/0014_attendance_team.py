@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:33
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def snapshot_current_teams(apps, schema_editor):
+    # Rows from before the column only have the user's current manager to go on
+    Attendance = apps.get_model('core', 'Attendance')
+    CustomUser = apps.get_model('core', 'CustomUser')
+    manager = CustomUser.objects.filter(pk=OuterRef('user_id')).values('manager_id')[:1]
+    Attendance.objects.filter(user__manager__isnull=False).update(team=Subquery(manager))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_calendar_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='team',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(snapshot_current_teams, migrations.RunPython.noop),
+    ]
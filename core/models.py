@@ -1,7 +1,13 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.timezone import localdate
 from datetime import time
 
+from . import workcalendar
+
 # ✅ Custom User Manager
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -19,6 +25,46 @@ class CustomUserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
+# ✅ Shift: working window, late cutoff, minimum hours and weekly offs
+class Shift(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    start_time = models.TimeField(default=time(9, 0))
+    late_after = models.TimeField(default=time(10, 6))  # Check-ins after this are late
+    end_time = models.TimeField(default=time(18, 0))
+    min_hours = models.FloatField(default=9.0)  # Hours needed for a valid day
+    weekly_off = models.PositiveSmallIntegerField(default=0b1100000)  # Bit n set = weekday n is off (Mon = 0)
+
+    def __str__(self):
+        return self.name
+
+
+# ✅ Holiday: applies to everyone, or only to one shift
+class Holiday(models.Model):
+    date = models.DateField(db_index=True)
+    name = models.CharField(max_length=100)
+    shift = models.ForeignKey(Shift, null=True, blank=True, on_delete=models.CASCADE, related_name='holidays')
+
+    def __str__(self):
+        return f"{self.date} - {self.name}"
+
+
+# ✅ Work calendar version (single row, pk=1), bumped on every Shift/Holiday write
+class CalendarVersion(models.Model):
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Calendar version {self.value}"
+
+
+# ✅ Any Shift/Holiday write invalidates compiled calendars. Signals also cover
+# QuerySet.delete() (e.g. the admin's "delete selected"); QuerySet.update() sends
+# none, so call workcalendar.bump_calendar_version() after bulk updates.
+@receiver([post_save, post_delete], sender=Shift)
+@receiver([post_save, post_delete], sender=Holiday)
+def _calendar_changed(sender, **kwargs):
+    workcalendar.bump_calendar_version()
+
+
 # ✅ Custom User Model
 class CustomUser(AbstractBaseUser, PermissionsMixin):
     ROLE_CHOICES = (
@@ -38,6 +84,13 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         on_delete=models.SET_NULL,
         related_name='employees'
     )
+    shift = models.ForeignKey(
+        Shift,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='users'
+    )  # None = ATTENDANCE_POLICY defaults
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -47,17 +100,63 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        moved = None
+        if self.pk and (update_fields is None or {'role', 'manager', 'manager_id'} & set(update_fields)):
+            moved = type(self).objects.filter(pk=self.pk).values_list('role', 'manager_id').first()
+            if moved == (self.role, self.manager_id):
+                moved = None
+
+        if moved:
+            # Pending approval counters follow the requester to their new inboxes
+            from .inbox import requester_moved
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                requester_moved(self, *moved)
+        else:
+            super().save(*args, **kwargs)
+
+        # Keep the fallback search index current (no-op on Postgres)
+        if update_fields is None or {'email', 'full_name'} & set(update_fields):
+            from .search import index_users
+            index_users([self])
+
     def __str__(self):
         return self.email
 
 
+# ✅ Trigram index for user search on databases without pg_trgm (SQLite in tests)
+class UserSearchGram(models.Model):
+    EMAIL, FULL_NAME = 0, 1
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='search_grams')
+    field = models.PositiveSmallIntegerField()  # EMAIL or FULL_NAME
+    gram = models.CharField(max_length=3)
+    total = models.PositiveSmallIntegerField()  # Trigrams in this user's field, for similarity
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['gram', 'user'], name='user_search_gram_idx'),
+        ]
+
+
 # ✅ Attendance Model
 class Attendance(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    date = models.DateField(auto_now_add=True)
+    date = models.DateField(default=localdate)  # Local (TIME_ZONE) day of the check-in
     check_in = models.DateTimeField()
     check_out = models.DateTimeField(null=True, blank=True)
     total_hours = models.FloatField(default=0.0)  # In hours
+    auto_closed = models.BooleanField(default=False)  # Checked out by the close-of-day batch
+    # Manager's user id at check-in time (0 = none): the team arrival buckets count it under
+    team = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # One session per user per day; also keeps buffered check-in replays idempotent
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_attendance_per_day'),
+        ]
 
     def save(self, *args, **kwargs):
         if self.check_in and self.check_out:
@@ -66,8 +165,8 @@ class Attendance(models.Model):
         super().save(*args, **kwargs)
 
     def is_late(self):
-        # ✅ Allow check-in up to 10:05:59 AM (inclusive)
-        return self.check_in.time() > time(10, 6)
+        # ✅ Late after the shift's cutoff (10:06 by default), in local time
+        return workcalendar.is_late(self.user.shift_id, self.check_in)
 
     def is_regularized(self):
         return RegularizationRequest.objects.filter(
@@ -77,7 +176,7 @@ class Attendance(models.Model):
         ).exists()
 
     def is_valid_day(self):
-        if self.total_hours >= 9.0:
+        if self.total_hours >= workcalendar.min_hours(self.user.shift_id):
             if not self.is_late():
                 return True
             return self.is_regularized()
@@ -90,6 +189,24 @@ class Attendance(models.Model):
         return f"{self.user.full_name} - {self.date}"
 
 
+# ✅ Absence Model (materialized nightly by the close_day command)
+class Absence(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='absences')
+    date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_absence_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='absence_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.full_name} - {self.date} - absent"
+
+
 # ✅ Regularization Model
 class RegularizationRequest(models.Model):
     STATUS_CHOICES = (
@@ -111,5 +228,95 @@ class RegularizationRequest(models.Model):
         related_name='approved_regularizations'
     )
 
+    class Meta:
+        indexes = [
+            # Only pending rows are indexed; inbox queries never look at processed ones
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(status='pending'),
+                name='reg_pending_created_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.full_name} - {self.date} - {self.status}"
+
+
+# ✅ Pending-approval counters, one row per inbox ('admin', 'hr', 'manager:<id>')
+class InboxCounter(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    pending = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.pending}"
+
+
+# ✅ Deleting a pending request (directly, via QuerySet.delete() or by cascade from its
+# user) takes it out of its inboxes. pre_delete: the requester row still exists here.
+@receiver(pre_delete, sender=RegularizationRequest)
+def _pending_request_deleted(sender, instance, **kwargs):
+    if instance.status == 'pending':
+        from .inbox import request_resolved
+        request_resolved(instance)
+
+
+# ✅ Arrival-time histogram: check-ins per team per day in 5-minute buckets
+class ArrivalBucket(models.Model):
+    team = models.BigIntegerField(default=0)  # Manager's user id, 0 for users without a manager
+    date = models.DateField()
+    bucket = models.PositiveSmallIntegerField()  # Minutes since local midnight // 5
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'date', 'bucket'], name='unique_arrival_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'team'], name='arrival_date_team_idx'),
+        ]
+
+    def __str__(self):
+        return f"team {self.team} - {self.date} - bucket {self.bucket}: {self.count}"
+
+
+# ✅ Audit trail: append-only, written in batches by core.audit. On Postgres the table is
+# range-partitioned by `month` (YYYYMM, see migration 0011 and audit.ensure_partitions);
+# elsewhere it is a plain column. Actor/subject are plain ids so events outlive their users.
+class AuditEvent(models.Model):
+    ACTION_CHOICES = (
+        ('checkin', 'Check-in'),
+        ('checkout', 'Check-out'),
+        ('auto_checkout', 'Automatic check-out'),
+        ('approve', 'Regularization approved'),
+        ('reject', 'Regularization rejected'),
+        ('user_create', 'User created'),
+        ('user_update', 'User updated'),
+        ('user_import', 'User imported'),
+    )
+
+    month = models.PositiveIntegerField()
+    occurred_at = models.DateTimeField()
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    actor = models.BigIntegerField(null=True, blank=True)  # None for system batches
+    subject = models.BigIntegerField(null=True, blank=True)  # User the event is about
+    object_type = models.CharField(max_length=40, blank=True)
+    object_id = models.BigIntegerField(null=True, blank=True)
+    details = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['actor', 'occurred_at'], name='audit_actor_idx'),
+            models.Index(fields=['subject', 'occurred_at'], name='audit_subject_idx'),
+            models.Index(fields=['occurred_at'], name='audit_time_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Audit events are append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Audit events are append-only")
+
+    def __str__(self):
+        return f"{self.occurred_at} - {self.action} - actor {self.actor} - subject {self.subject}"
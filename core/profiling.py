@@ -0,0 +1,137 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+FOLDED_SUFFIX = '.folded'
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# ✅ Samples one thread's stack every `interval` seconds into collapsed-stack counts
+class SamplingProfiler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def write_profile(directory, meta, samples):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    view = re.sub(r'[^A-Za-z0-9_.-]+', '_', meta['view'])
+    path = directory / f"{view}.{time.time_ns()}.{os.getpid()}{FOLDED_SUFFIX}"
+    with open(path, 'w') as f:
+        # flamegraph.pl / speedscope skip lines that are not "stack count"
+        for key, value in meta.items():
+            f.write(f"# {key}={value}\n")
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+def read_profile(path):
+    meta, samples = {}, Counter()
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.startswith('# '):
+                key, _, value = line[2:].partition('=')
+                meta[key] = value
+            elif line:
+                stack, _, count = line.rpartition(' ')
+                samples[stack] += int(count)
+    return meta, samples
+
+
+# ✅ Profiles selected requests: admins sending the profiling header, plus a random sample
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.header = settings.PROFILING_HEADER
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.interval = settings.PROFILING_INTERVAL
+        self.directory = settings.PROFILING_DIR
+
+    def _requested_by_admin(self, request):
+        if self.header not in request.META:
+            return False
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except Exception:
+            return False
+        user = result[0] if result else request.user
+        return bool(user and user.is_authenticated and (user.role == 'admin' or user.is_superuser))
+
+    def __call__(self, request):
+        requested = self._requested_by_admin(request)
+        if not requested and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        queries = _QueryCounter()
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            with connection.execute_wrapper(queries):
+                response = self.get_response(request)
+        finally:
+            profiler.stop()
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        path = write_profile(self.directory, {
+            'view': match.view_name if match else 'unresolved',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'queries': queries.count,
+            'interval_ms': self.interval * 1000,
+        }, profiler.samples)
+        # Only the admin who asked learns the file name; sampled requests stay unmarked
+        if requested:
+            response['X-Profile'] = path.name
+        return response
@@ -0,0 +1,112 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import CustomUser, UserSearchGram
+
+# pg_trgm's default similarity threshold
+SIMILARITY_THRESHOLD = 0.3
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+# ✅ Trigrams the way pg_trgm builds them: lowercase words padded with "  " and " "
+def trigrams(text):
+    grams = set()
+    for word in WORD_RE.findall((text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _gram_rows(user):
+    rows = []
+    for field, text in [(UserSearchGram.EMAIL, user.email), (UserSearchGram.FULL_NAME, user.full_name)]:
+        grams = trigrams(text)
+        rows.extend(UserSearchGram(user_id=user.id, field=field, gram=g, total=len(grams)) for g in grams)
+    return rows
+
+
+# ✅ Fallback index maintenance (databases without pg_trgm, e.g. SQLite in tests)
+def index_users(users):
+    if uses_postgres():
+        return
+    users = list(users)
+    rows = [row for user in users for row in _gram_rows(user)]
+    with transaction.atomic():
+        UserSearchGram.objects.filter(user_id__in=[u.id for u in users]).delete()
+        UserSearchGram.objects.bulk_create(rows, batch_size=1000)
+
+
+def rebuild_index(chunk_size=2000):
+    if uses_postgres():
+        return 0
+    UserSearchGram.objects.all().delete()
+    total = 0
+    batch = []
+    for user in CustomUser.objects.only('id', 'email', 'full_name').iterator(chunk_size):
+        batch.append(user)
+        if len(batch) == chunk_size:
+            index_users(batch)
+            total += len(batch)
+            batch = []
+    index_users(batch)
+    return total + len(batch)
+
+
+def _postgres_search(queryset, query):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    return queryset.filter(
+        Q(email__trigram_similar=query) | Q(full_name__trigram_similar=query) |
+        Q(email__icontains=query) | Q(full_name__icontains=query)
+    ).annotate(
+        rank=Greatest(TrigramSimilarity('email', query), TrigramSimilarity('full_name', query)),
+    )
+
+
+def _fallback_search(queryset, query):
+    # Same measure as pg_trgm similarity(): shared / (query + field - shared) trigrams,
+    # best of email and full_name, from one GROUP BY over the gram index. Substring
+    # matches are included like on Postgres, ranked by their (sub-threshold) similarity.
+    substring = Q(email__icontains=query) | Q(full_name__icontains=query)
+    grams = trigrams(query)
+    if not grams:
+        return queryset.filter(substring).annotate(rank=Value(0.0))
+    scored = (
+        UserSearchGram.objects.filter(gram__in=grams)
+        .values('user_id', 'field')
+        .annotate(hits=Count('id'), size=Max('total'))
+        .annotate(rank=ExpressionWrapper(
+            F('hits') * 1.0 / (len(grams) + F('size') - F('hits')), output_field=FloatField()
+        ))
+    )
+    similar = scored.filter(rank__gte=SIMILARITY_THRESHOLD)
+    best = scored.filter(user_id=OuterRef('pk')).order_by('-rank').values('rank')[:1]
+    return queryset.filter(Q(pk__in=similar.values('user_id')) | substring).annotate(
+        rank=Coalesce(Subquery(best), Value(0.0)),
+    )
+
+
+# ✅ Ranked user search with optional role / manager filters
+def search_users(query, role=None, manager=None):
+    queryset = CustomUser.objects.select_related('manager')
+    if role:
+        queryset = queryset.filter(role=role)
+    if manager:
+        queryset = queryset.filter(manager_id=manager)
+
+    query = (query or '').strip()
+    if not query:
+        return queryset.order_by('full_name', 'id')
+
+    if uses_postgres():
+        queryset = _postgres_search(queryset, query)
+    else:
+        queryset = _fallback_search(queryset, query)
+    return queryset.order_by('-rank', 'full_name', 'id')
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import CustomUser, Attendance, RegularizationRequest
+from .models import CustomUser, Attendance, RegularizationRequest, AuditEvent
 from django.contrib.auth.password_validation import validate_password
 
 # 1. Register Serializer
@@ -43,7 +43,7 @@ class AttendanceSerializer(serializers.ModelSerializer):
         model = Attendance
         fields = [
             'id', 'user', 'user_name', 'date', 'check_in', 'check_out', 'total_hours',
-            'status', 'is_late', 'is_regularized'
+            'auto_closed', 'status', 'is_late', 'is_regularized'
         ]
 
     def get_status(self, obj):
@@ -80,3 +80,16 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ['id', 'email', 'full_name', 'role', 'manager', 'manager_name']
+
+# 6. User Search Result (ranked)
+class UserSearchSerializer(UserSerializer):
+    rank = serializers.FloatField(read_only=True, default=None)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ['rank']
+
+# 7. Audit events (read-only)
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = ['id', 'occurred_at', 'action', 'actor', 'subject', 'object_type', 'object_id', 'details']
@@ -1,3 +1,861 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import pyarrow as pa
+import pyarrow.parquet as pq
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.timezone import localdate, make_aware, now
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import analytics, audit, checkin_buffer, export, inbox, profiling, throttling, today_status, workcalendar
+from .checkin_buffer import CheckInBuffer, write_entries
+from .close_of_day import close_day, insert_absences
+from .models import (
+    Absence, ArrivalBucket, Attendance, AuditEvent, CalendarVersion, CustomUser, Holiday, RegularizationRequest, Shift,
+)
+
+
+def make_user(email, role='employee', manager=None, password=None, **extra):
+    return CustomUser.objects.create_user(
+        email=email, password=password, full_name=email.split('@')[0], role=role, manager=manager, **extra
+    )
+
+
+def auth(user):
+    return {'authorization': f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+
+# ✅ Write-behind check-ins
+class CheckInBufferFlushTests(TransactionTestCase):
+    def setUp(self):
+        self.manager = make_user('mgr@example.com', role='manager')
+        self.users = [make_user(f'emp{i}@example.com', manager=self.manager) for i in range(50)]
+        self.buffer = CheckInBuffer(tempfile.mkdtemp(), interval=3600)
+
+    def tearDown(self):
+        self.buffer.close()
+
+    def test_concurrent_flushes_write_each_punch_once(self):
+        today = localdate()
+        for user in self.users:
+            self.buffer.submit(user, today, now())
+
+        start = threading.Barrier(2)
+
+        def flush():
+            start.wait()
+            try:
+                self.buffer.flush()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=flush) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(Attendance.objects.filter(date=today).count(), 50)
+        self.assertEqual(sum(ArrivalBucket.objects.values_list('count', flat=True)), 50)
+
+    def test_concurrent_punches_share_fsyncs(self):
+        fsyncs = []
+        real_fsync = os.fsync
+
+        def slow_fsync(fd):
+            fsyncs.append(fd)
+            time.sleep(0.01)
+            real_fsync(fd)
+
+        today = localdate()
+        start = threading.Barrier(len(self.users))
+
+        def submit(user):
+            start.wait()
+            self.assertTrue(self.buffer.submit(user, today, now()))
+
+        with mock.patch.object(checkin_buffer.os, 'fsync', slow_fsync):
+            threads = [threading.Thread(target=submit, args=(u,)) for u in self.users]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertLess(len(fsyncs), len(self.users))
+        self.assertEqual(self.buffer._synced, len(self.users))
+        self.assertEqual(len(checkin_buffer._read_log(self.buffer.path)), len(self.users))
+
+    def test_recovery_never_unlinks_a_compacted_live_log(self):
+        self.buffer.submit(self.users[0], localdate(), now())
+        real_open = os.open
+
+        def open_then_compact(path, flags, *args):
+            fd = real_open(path, flags, *args)
+            if flags == os.O_RDONLY:
+                # The live owner compacts right after the recovering process opened the old file
+                with self.buffer._lock:
+                    self.buffer._compact()
+            return fd
+
+        with mock.patch.object(checkin_buffer.os, 'open', open_then_compact):
+            self.buffer.recover()
+
+        self.assertTrue(self.buffer.path.exists())
+        self.assertEqual(len(checkin_buffer._read_log(self.buffer.path)), 1)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_replay_of_entries_already_written_elsewhere_is_a_no_op(self):
+        today = localdate()
+        entries = [
+            {'user': u.id, 'manager': u.manager_id, 'date': today, 'check_in': now()} for u in self.users[:5]
+        ]
+        self.assertEqual(write_entries(entries), 5)
+        # Another process won the same (user, date) with a different punch
+        clash = dict(entries[0], check_in=entries[0]['check_in'] + timedelta(seconds=1))
+        self.assertEqual(write_entries(entries + [clash]), 0)
+
+        self.assertEqual(Attendance.objects.filter(date=today).count(), 5)
+        self.assertEqual(sum(ArrivalBucket.objects.values_list('count', flat=True)), 5)
+
+
+# ✅ Approver inbox counters
+class InboxCounterTests(TestCase):
+    def setUp(self):
+        self.manager_a = make_user('a@example.com', role='manager')
+        self.manager_b = make_user('b@example.com', role='manager')
+        self.employee = make_user('emp@example.com', manager=self.manager_a)
+
+    def create_request(self):
+        reg = RegularizationRequest.objects.create(user=self.employee, date=localdate(), reason='Traffic')
+        inbox.request_created(reg)
+        return reg
+
+    def test_pending_requests_follow_a_manager_change(self):
+        reg = self.create_request()
+        self.employee.manager = self.manager_b
+        self.employee.save()
+
+        self.assertEqual(inbox.pending_count(self.manager_a), 0)
+        self.assertEqual(inbox.pending_count(self.manager_b), 1)
+
+        reg.status = 'approved'
+        reg.save()
+        inbox.request_resolved(reg)
+        self.assertEqual(inbox.pending_count(self.manager_b), 0)
+
+        # The next real request is counted, not hidden behind a negative counter
+        self.create_request()
+        self.assertEqual(inbox.pending_count(self.manager_b), 1)
+        self.assertEqual(inbox.pending_count(self.manager_a), 0)
+
+    def test_deleting_a_requester_clears_their_pending_requests(self):
+        hr = make_user('hr@example.com', role='hr')
+        self.create_request()
+        self.employee.delete()
+        self.assertEqual(inbox.pending_count(self.manager_a), 0)
+        self.assertEqual(inbox.pending_count(hr), 0)
+
+    def test_queryset_delete_only_counts_pending_requests(self):
+        self.create_request()
+        resolved = self.create_request()
+        resolved.status = 'rejected'
+        resolved.save()
+        inbox.request_resolved(resolved)
+        self.assertEqual(inbox.pending_count(self.manager_a), 1)
+
+        RegularizationRequest.objects.filter(user=self.employee).delete()
+        self.assertEqual(inbox.pending_count(self.manager_a), 0)
+        admin = make_user('admin@example.com', role='admin')
+        self.assertEqual(inbox.InboxCounter.objects.get(key='admin').pending, 0)
+        self.assertEqual(inbox.pending_count(admin), 0)
+
+    def test_role_change_moves_requests_out_of_the_hr_inbox(self):
+        hr = make_user('hr@example.com', role='hr')
+        self.create_request()
+        self.assertEqual(inbox.pending_count(hr), 1)
+        self.employee.role = 'manager'
+        self.employee.save()
+        self.assertEqual(inbox.pending_count(hr), 0)
+
+
+# ✅ Work calendar invalidation
+class WorkCalendarTests(TestCase):
+    def setUp(self):
+        # Calendars compiled by earlier tests are this process's cache; re-check the version now
+        workcalendar._version['checked_at'] = 0.0
+
+    def test_queryset_delete_of_a_holiday_reopens_the_day(self):
+        day = localdate()
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        Holiday.objects.create(date=day, name='Festival')
+        self.assertFalse(workcalendar.is_working_day(None, day))
+
+        Holiday.objects.filter(date=day).delete()  # What the admin's "delete selected" does
+        self.assertTrue(workcalendar.is_working_day(None, day))
+
+    def test_other_processes_see_the_bump_after_the_ttl(self):
+        day = localdate()
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        self.assertTrue(workcalendar.is_working_day(None, day))
+        # Another worker's edit: only the shared version row changes, not this process's state
+        Holiday.objects.bulk_create([Holiday(date=day, name='Festival')])
+        CalendarVersion.objects.filter(pk=1).update(value=F('value') + 1)
+        self.assertTrue(workcalendar.is_working_day(None, day))  # Still within VERSION_TTL
+
+        workcalendar._version['checked_at'] -= workcalendar.VERSION_TTL
+        self.assertFalse(workcalendar.is_working_day(None, day))
+
+    def test_async_calendar_sees_version_bumps(self):
+        day = localdate()
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        calendar = async_to_sync(workcalendar.amonth_calendar)
+        self.assertTrue(calendar(None, day.year, day.month).is_working(day.day))
+
+        Holiday.objects.create(date=day, name='Festival')
+        self.assertFalse(calendar(None, day.year, day.month).is_working(day.day))
+
+
+# ✅ Admin bulk import
+@override_settings(THROTTLE_ENABLED=False)
+class BulkImportTests(TestCase):
+    url = '/api/admin/users/import/'
+
+    def setUp(self):
+        self.admin = make_user('admin@example.com', role='admin')
+        self.manager = make_user('mgr@x.io', role='manager')
+
+    def post(self, payload, query=''):
+        return self.client.post(self.url + query, payload, content_type='application/json', headers=auth(self.admin))
+
+    def row(self, **extra):
+        return dict({'email': 'new@x.io', 'full_name': 'New Hire', 'role': 'employee', 'password': 'Str0ng-Passw0rd'}, **extra)
+
+    def test_rows_that_are_not_objects_are_row_errors(self):
+        response = self.post(['bad', self.row()])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['row'] for e in response.json()['errors']], [1])
+
+    def test_users_must_be_a_list(self):
+        self.assertEqual(self.post({'users': 'x'}).status_code, 400)
+
+    def test_manager_email_matches_case_insensitively(self):
+        response = self.post([self.row(manager_email='MGR@x.io')])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(CustomUser.objects.get(email='new@x.io').manager_id, self.manager.id)
+
+    def test_in_file_manager_matches_case_insensitively(self):
+        boss = self.row(email='Boss@corp.com', full_name='Boss', role='manager')
+        report = self.post([boss, self.row(manager_email='boss@corp.com')])
+        self.assertEqual(report.status_code, 201, report.content)
+        boss_id = CustomUser.objects.get(email='Boss@corp.com').id
+        self.assertEqual(CustomUser.objects.get(email='new@x.io').manager_id, boss_id)
+
+    def test_non_string_fields_are_row_errors(self):
+        response = self.post([
+            self.row(password=12345678901),
+            self.row(email='other@x.io', full_name=['x']),
+            self.row(email=42),
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = {e['row']: e['errors'] for e in response.json()['errors']}
+        self.assertEqual(errors, {
+            1: ['password must be a string.'], 2: ['full_name must be a string.'], 3: ['email must be a string.'],
+        })
+
+    def test_dry_run_false_imports(self):
+        self.assertEqual(self.post([self.row()], '?dry_run=true').status_code, 200)
+        self.assertFalse(CustomUser.objects.filter(email='new@x.io').exists())
+        self.assertEqual(self.post([self.row()], '?dry_run=false').status_code, 201)
+        self.assertTrue(CustomUser.objects.filter(email='new@x.io').exists())
+
+
+# ✅ Throttling and load shedding
+@override_settings(THROTTLE_ENABLED=True, THROTTLE_BACKEND='local', THROTTLE_BUCKETS={'checkin': {'user': (5, 0.2)}})
+class ThrottlingTests(TestCase):
+    url = '/api/employee/checkin/'
+
+    def setUp(self):
+        throttling._backend = None
+        caches['default'].clear()  # Today-status entries from earlier tests (ids are reused)
+        self.abuser = make_user('abuser@example.com')
+        self.other = make_user('other@example.com')
+
+    def tearDown(self):
+        throttling._backend = None
+
+    def test_abusive_checkins_are_throttled_without_blocking_other_users(self):
+        statuses = [self.client.post(self.url, headers=auth(self.abuser)).status_code for _ in range(5)]
+        self.assertEqual(statuses, [200, 400, 400, 400, 400])
+
+        throttled = self.client.post(self.url, headers=auth(self.abuser))
+        self.assertEqual(throttled.status_code, 429)
+        self.assertGreaterEqual(int(throttled['Retry-After']), 1)
+
+        self.assertEqual(self.client.post(self.url, headers=auth(self.other)).status_code, 200)
+
+    def test_local_buckets_stay_bounded(self):
+        buckets = throttling.LocalBuckets(max_keys=100)
+        for i in range(1000):
+            buckets.take(f"login:ip:10.0.{i // 256}.{i % 256}", 20, 1.0)
+        self.assertEqual(len(buckets._buckets), 100)
+        # An active key survives because every take() marks it as recently used
+        for i in range(300):
+            buckets.take('login:ip:attacker', 2, 0.001)
+            buckets.take(f"login:ip:192.168.0.{i % 256}", 20, 1.0)
+        self.assertTrue(buckets.take('login:ip:attacker', 2, 0.001) > 0)
+
+
+@override_settings(
+    THROTTLE_ENABLED=True, THROTTLE_BACKEND='local',
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],  # Failed logins still hash once
+)
+class LoginThrottleTests(TransactionTestCase):
+    def setUp(self):
+        throttling._backend = None
+        self.addCleanup(setattr, throttling, '_backend', None)
+
+    def login(self, url, email):
+        return self.client.post(url, {'email': email, 'password': 'wrong'}, content_type='application/json').status_code
+
+    def test_one_office_address_is_not_one_bucket(self):
+        for url in ['/api/login/', '/api/login/async/']:
+            statuses = [self.login(url, f'person{i}@example.com') for i in range(30)]
+            self.assertEqual(set(statuses), {401}, url)
+
+    def test_guessing_one_account_is_throttled(self):
+        for url in ['/api/login/', '/api/login/async/']:
+            statuses = [self.login(url, f'Target@{url.count("async")}.example.com') for _ in range(11)]
+            self.assertEqual(statuses, [401] * 10 + [429], url)
+
+    @override_settings(THROTTLE_BACKEND='cache')
+    def test_async_login_uses_the_async_cache_api(self):
+        with mock.patch.object(throttling.CacheBuckets, 'take', side_effect=AssertionError("sync cache call")):
+            statuses = [self.login('/api/login/async/', 'target@example.com') for _ in range(11)]
+        self.assertEqual(statuses, [401] * 10 + [429])
+
+
+@override_settings(LOAD_SHED_LIMITS={'write': 1, 'read': 1}, LOAD_SHED_RETRY_AFTER=2)
+class LoadSheddingTests(TestCase):
+    def test_requests_past_the_limit_get_503(self):
+        factory = RequestFactory()
+        inner = {}
+
+        def get_response(request):
+            # A second request arrives while this one is still in flight
+            inner['response'] = middleware(factory.post('/api/employee/checkin/'))
+            return HttpResponse('ok')
+
+        middleware = throttling.LoadSheddingMiddleware(get_response)
+        self.assertEqual(middleware(factory.post('/api/employee/checkin/')).status_code, 200)
+        self.assertEqual(inner['response'].status_code, 503)
+        self.assertEqual(inner['response']['Retry-After'], '2')
+        # The slot is released once the first request finishes
+        self.assertEqual(middleware(factory.get('/api/employee/today/')).status_code, 200)
+
+
+# ✅ Columnar export
+@override_settings(THROTTLE_ENABLED=False)
+class ColumnarExportTests(TestCase):
+    def setUp(self):
+        self.hr = make_user('hr@example.com', role='hr')
+        make_user('legacy@example.com', role='contractor')  # Not in ROLE_CHOICES
+        for i in range(5):
+            make_user(f'emp{i}@example.com')
+
+    def get(self, dataset, fmt):
+        return self.client.get(f'/api/admin/export/{dataset}/?fmt={fmt}', headers=auth(self.hr))
+
+    def test_arrow_is_streamed_batch_by_batch(self):
+        export.CHUNK_SIZE, chunk_size = 2, export.CHUNK_SIZE
+        try:
+            response = self.get('users', 'arrow')
+            self.assertTrue(response.streaming)
+            chunks = list(response.streaming_content)
+        finally:
+            export.CHUNK_SIZE = chunk_size
+        self.assertGreater(len(chunks), 4)
+        table = pa.ipc.open_stream(b''.join(chunks)).read_all()
+        self.assertEqual(table.num_rows, 7)
+
+    def test_unknown_codes_export_as_null(self):
+        response = self.get('users', 'parquet')
+        self.assertEqual(response.status_code, 200)
+        table = pq.read_table(pa.BufferReader(b''.join(response.streaming_content))).to_pydict()
+        roles = dict(zip(table['email'], table['role']))
+        self.assertIsNone(roles['legacy@example.com'])
+        self.assertEqual(roles['hr@example.com'], 'hr')
+
+
+# ✅ Date parameters
+@override_settings(THROTTLE_ENABLED=False)
+class InvalidDateTests(TestCase):
+    def setUp(self):
+        self.hr = make_user('hr@example.com', role='hr')
+
+    def test_impossible_dates_are_rejected_with_400(self):
+        for url in ['/api/hr/analytics/arrivals/?from=2026-02-30', '/api/admin/audit/?start=2026-13-01']:
+            self.assertEqual(self.client.get(url, headers=auth(self.hr)).status_code, 400, url)
+
+    def test_close_day_rejects_impossible_dates(self):
+        with self.assertRaises(CommandError):
+            call_command('close_day', date='2026-02-30')
+
+
+# ✅ Async login
+@override_settings(THROTTLE_ENABLED=False)
+class AsyncLoginTests(TransactionTestCase):
+    url = '/api/login/async/'
+
+    def test_json_bodies_that_are_not_objects_get_401(self):
+        for body in ['[1]', '3', '"x"', 'null', '{"email": ["a"], "password": "p"}']:
+            response = self.client.post(self.url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 401, body)
+
+    def test_valid_credentials_log_in(self):
+        make_user('emp@example.com', password='Str0ng-Passw0rd')
+        response = self.client.post(
+            self.url, {'email': 'emp@example.com', 'password': 'Str0ng-Passw0rd'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+
+
+# ✅ Today-status cache
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()},
+}
+
+
+@override_settings(THROTTLE_ENABLED=False, CACHES=SHARED_CACHES, TODAY_STATUS_CACHE='shared')
+class TodayStatusTests(TestCase):
+    def setUp(self):
+        self.employee = make_user('emp@example.com')
+        self.today = localdate()
+        caches['default'].clear()
+        caches['shared'].clear()
+
+    def checkin(self):
+        return self.client.post('/api/employee/checkin/', headers=auth(self.employee))
+
+    def status(self):
+        return self.client.get('/api/employee/today/', headers=auth(self.employee)).json()
+
+    def test_a_slow_negative_read_never_overwrites_a_check_in(self):
+        # A status read misses the cache and finds no row...
+        stale = today_status.not_checked_in(self.today)
+        # ...meanwhile the check-in lands and stores its state
+        self.assertEqual(self.checkin().status_code, 200)
+        today_status.remember(self.employee.id, stale)
+
+        self.assertTrue(today_status.cached(self.employee.id, self.today)['checked_in'])
+        self.assertTrue(self.status()['checked_in'])
+
+    def test_check_out_replaces_the_cached_check_in(self):
+        self.checkin()
+        self.assertEqual(self.client.post('/api/employee/checkout/', headers=auth(self.employee)).status_code, 200)
+        self.assertTrue(self.status()['checked_out'])
+
+    @override_settings(TODAY_STATUS_CACHE='default')
+    def test_per_process_cache_keeps_the_short_circuit_and_rereads_open_entries(self):
+        self.assertFalse(today_status.is_shared())
+        self.checkin()
+        with self.assertNumQueries(0):
+            self.assertEqual(today_status.cached(self.employee.id, self.today)['checked_in'], True)
+        self.assertEqual(self.checkin().status_code, 400)
+
+        # Another worker checks the user out; this worker's entry is still "checked in"
+        Attendance.objects.filter(user=self.employee, date=self.today).update(check_out=now(), total_hours=8.0)
+        with override_settings(TODAY_STATUS_LOCAL_TTL=0):
+            self.assertTrue(self.status()['checked_out'])
+        # The re-read refreshed the entry, and a final entry is trusted from now on
+        self.assertIsNotNone(today_status.cached(self.employee.id, self.today)['check_out'])
+        self.assertTrue(self.status()['checked_out'])
+
+    @override_settings(TODAY_STATUS_CACHE='default')
+    def test_per_process_refresh_never_moves_backwards(self):
+        self.checkin()
+        today_status.remember(self.employee.id, today_status.not_checked_in(self.today))
+        self.assertTrue(today_status.cached(self.employee.id, self.today)['checked_in'])
+
+
+# ✅ User search (the gram-index fallback; Postgres uses pg_trgm with the same rules)
+@override_settings(THROTTLE_ENABLED=False)
+class UserSearchTests(TestCase):
+    url = '/api/users/search/'
+
+    def setUp(self):
+        self.hr = make_user('hr@example.com', role='hr')
+        self.manager = make_user('lead@example.com', role='manager')
+        self.other_manager = make_user('boss@example.com', role='manager')
+        self.smith = make_user('john.smith@example.com', manager=self.manager)
+        self.smythe = make_user('jane.smythe@example.com', manager=self.other_manager)
+        self.smithson = make_user('sam.smithson@example.com', role='manager')
+
+    def search(self, user, **params):
+        response = self.client.get(self.url, params, headers=auth(user))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def emails(self, user, **params):
+        return [r['email'] for r in self.search(user, **params)['results']]
+
+    def test_type_ahead_prefix_matches_like_postgres(self):
+        self.assertEqual(
+            set(self.emails(self.hr, q='smi')), {'john.smith@example.com', 'sam.smithson@example.com'}
+        )
+
+    def test_closest_match_ranks_first(self):
+        results = self.emails(self.hr, q='john.smith')
+        self.assertEqual(results[0], 'john.smith@example.com')
+        self.assertNotIn('hr@example.com', results)
+
+    def test_role_and_manager_filters(self):
+        self.assertEqual(self.emails(self.hr, q='smi', role='manager'), ['sam.smithson@example.com'])
+        self.assertEqual(self.emails(self.hr, q='sm', manager=self.other_manager.id), ['jane.smythe@example.com'])
+
+    def test_managers_only_search_their_team(self):
+        self.assertEqual(self.emails(self.manager, q='sm', manager=self.other_manager.id), ['john.smith@example.com'])
+        self.assertEqual(self.emails(self.smith, q='sm'), [])
+
+    def test_pagination(self):
+        for i in range(5):
+            make_user(f'temp{i}@example.com')
+        page = self.search(self.hr, q='temp', page_size=2, page=2)
+        self.assertEqual(page['count'], 5)
+        self.assertEqual(len(page['results']), 2)
+        self.assertIsNotNone(page['next'])
+        self.assertIsNotNone(page['previous'])
+
+
+# ✅ Close of day
+class CloseDayTests(TestCase):
+    day = date(2026, 3, 4)  # A Wednesday
+
+    def setUp(self):
+        workcalendar._version['checked_at'] = 0.0
+        self.open_user = make_user('open@example.com')
+        self.done_user = make_user('done@example.com')
+        self.absent = make_user('absent@example.com')
+        self.absent_manager = make_user('absent-mgr@example.com', role='manager')
+        make_user('admin@example.com', role='admin')  # Not in CLOSE_OF_DAY_ROLES
+        make_user('left@example.com', is_active=False)
+        night = Shift.objects.create(name='Night', weekly_off=1 << self.day.weekday())
+        make_user('night@example.com', shift=night)  # Wednesday is this shift's weekly off
+
+        self.check_in = make_aware(datetime.combine(self.day, dtime(9, 30)))
+        self.open_row = Attendance.objects.create(user=self.open_user, date=self.day, check_in=self.check_in)
+        self.done_row = Attendance.objects.create(
+            user=self.done_user, date=self.day, check_in=self.check_in,
+            check_out=self.check_in + timedelta(hours=8), total_hours=8.0,
+        )
+
+    def absentees(self, day=None):
+        return set(Absence.objects.filter(date=day or self.day).values_list('user__email', flat=True))
+
+    def test_close_policy_and_rerun(self):
+        result = close_day(self.day, policy='close')
+        self.assertEqual((result['closed'], result['absences']), (1, 2))
+
+        self.open_row.refresh_from_db()
+        self.assertEqual(self.open_row.check_out, self.check_in)
+        self.assertEqual(self.open_row.total_hours, 0.0)
+        self.assertTrue(self.open_row.auto_closed)
+        self.done_row.refresh_from_db()
+        self.assertEqual(self.done_row.total_hours, 8.0)
+        self.assertFalse(self.done_row.auto_closed)
+        self.assertEqual(self.absentees(), {'absent@example.com', 'absent-mgr@example.com'})
+
+        rerun = close_day(self.day, policy='close')
+        self.assertEqual((rerun['closed'], rerun['absences']), (0, 0))
+        self.assertEqual(Absence.objects.filter(date=self.day).count(), 2)
+
+    def test_credit_policy(self):
+        close_day(self.day, policy='credit', hours=9)
+        self.open_row.refresh_from_db()
+        self.assertEqual(self.open_row.check_out, self.check_in + timedelta(hours=9))
+        self.assertEqual(self.open_row.total_hours, 9.0)
+        self.assertTrue(self.open_row.auto_closed)
+
+    def test_none_policy_leaves_sessions_open_but_records_absences(self):
+        result = close_day(self.day, policy='none')
+        self.assertEqual((result['closed'], result['absences']), (0, 2))
+        self.open_row.refresh_from_db()
+        self.assertIsNone(self.open_row.check_out)
+        self.assertFalse(self.open_row.auto_closed)
+
+    def test_holidays_and_weekly_offs_record_no_absences(self):
+        Holiday.objects.create(date=self.day, name='Festival')
+        self.assertEqual(close_day(self.day)['absences'], 0)
+        # Saturday is a default-policy weekly off, but a working day for the night shift
+        saturday = self.day + timedelta(days=3)
+        self.assertEqual(close_day(saturday)['absences'], 1)
+        self.assertEqual(self.absentees(saturday), {'night@example.com'})
+
+    def test_absences_take_one_statement_whatever_the_headcount(self):
+        for i in range(30):
+            make_user(f'extra{i}@example.com')
+        workcalendar.working_shift_ids(self.day)  # Calendars compiled
+        with self.assertNumQueries(2):  # Shift ids + INSERT ... SELECT
+            self.assertEqual(insert_absences(self.day, ['employee', 'manager', 'hr']), 32)
+
+    def test_command_runs_twice(self):
+        out = io.StringIO()
+        call_command('close_day', date=self.day.isoformat(), policy='close', stdout=out)
+        call_command('close_day', date=self.day.isoformat(), policy='close', stdout=out)
+        first, second = out.getvalue().splitlines()
+        self.assertIn('closed 1 open sessions', first)
+        self.assertIn('recorded 2 absences', first)
+        self.assertIn('closed 0 open sessions', second)
+        self.assertIn('recorded 0 absences', second)
+
+
+# ✅ Arrival analytics
+@override_settings(THROTTLE_ENABLED=False)
+class ArrivalAnalyticsTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()  # Today-status entries from earlier tests (ids are reused)
+        self.manager = make_user('lead@example.com', role='manager')
+        self.other_manager = make_user('boss@example.com', role='manager')
+        self.employees = [make_user(f'emp{i}@example.com', manager=self.manager) for i in range(3)]
+        self.loner = make_user('loner@example.com')
+
+    def buckets(self):
+        return set(ArrivalBucket.objects.values_list('team', 'date', 'bucket', 'count'))
+
+    def test_check_ins_update_buckets_incrementally(self):
+        for user in self.employees + [self.loner]:
+            self.assertEqual(self.client.post('/api/employee/checkin/', headers=auth(user)).status_code, 200)
+        local = timezone.localtime(Attendance.objects.get(user=self.loner).check_in)
+        teams = {team: n for team, _, _, n in self.buckets()}
+        self.assertEqual(sum(teams.values()), 4)
+        self.assertEqual(teams[0], 1)
+        self.assertTrue(ArrivalBucket.objects.filter(
+            team=0, date=localdate(), bucket=analytics.bucket_for(local.hour, local.minute)
+        ).exists())
+
+    def test_backfill_reproduces_incremental_counts_after_a_team_change(self):
+        for user in self.employees + [self.loner]:
+            self.client.post('/api/employee/checkin/', headers=auth(user))
+        incremental = self.buckets()
+
+        self.employees[0].manager = self.other_manager
+        self.employees[0].save()
+        analytics.backfill_arrivals(localdate(), localdate())
+        self.assertEqual(self.buckets(), incremental)
+
+    def test_histogram(self):
+        monday = date(2026, 3, 2)
+        arrivals = [(9, 0), (9, 3), (9, 40), (10, 30)]
+        for i, (hour, minute) in enumerate(arrivals):
+            analytics.record_arrivals([
+                (self.manager.id, monday + timedelta(days=i % 2), make_aware(datetime.combine(monday, dtime(hour, minute))))
+            ])
+        analytics.record_arrivals([(None, monday, make_aware(datetime.combine(monday, dtime(8, 0))))])
+
+        weekly = analytics.arrival_histogram(monday, monday + timedelta(days=6), teams=[self.manager.id])
+        self.assertEqual(weekly['late_cutoff'], '10:06')
+        self.assertEqual(weekly['cutoff_bucket'], '10:05')
+        [series] = weekly['series']
+        self.assertEqual(series['team_name'], self.manager.full_name)
+        self.assertEqual(series['total'], 4)
+        self.assertEqual(series['buckets'], [['09:00', 2], ['09:40', 1], ['10:30', 1]])
+
+        daily = analytics.arrival_histogram(monday, monday + timedelta(days=6), group='day')
+        totals = {(s['team_name'], s['period']): s['total'] for s in daily['series']}
+        self.assertEqual(totals, {
+            ('No manager', monday): 1,
+            (self.manager.full_name, monday): 2,
+            (self.manager.full_name, monday + timedelta(days=1)): 2,
+        })
+
+
+# ✅ Audit trail
+class AuditBufferTests(TestCase):
+    def setUp(self):
+        self.user = make_user('emp@example.com')
+        # No flusher thread: the tests flush by hand, inside the test transaction
+        with mock.patch.object(audit, 'PeriodicFlusher'):
+            self.buffer = audit.AuditBuffer(3600, 500, 3)
+        patcher = mock.patch.object(audit, 'get_buffer', return_value=self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def actions(self):
+        return list(AuditEvent.objects.order_by('id').values_list('action', flat=True))
+
+    def test_events_are_queued_when_the_transaction_commits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record('checkin', self.user, self.user, date=localdate())
+            self.assertEqual(self.buffer._events, [])
+        self.assertEqual(len(self.buffer._events), 1)
+        self.assertEqual(self.buffer.flush(), 1)
+        event = AuditEvent.objects.get()
+        self.assertEqual((event.action, event.actor, event.subject), ('checkin', self.user.id, self.user.id))
+
+    def test_rolled_back_writes_leave_no_trail(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    audit.record('checkin', self.user, self.user)
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.buffer._events, [])
+
+    def test_failed_flush_puts_the_batch_back_in_order(self):
+        self.buffer.extend([audit.event('checkin', self.user), audit.event('checkout', self.user)])
+        with mock.patch.object(AuditEvent.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.buffer.extend([audit.event('approve', self.user)])
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(self.actions(), ['checkin', 'checkout', 'approve'])
+
+    def test_events_past_max_pending_are_dropped(self):
+        with self.assertLogs('core.audit', 'ERROR'):
+            self.buffer.extend([audit.event('checkin', self.user) for _ in range(5)])
+        self.assertEqual(len(self.buffer._events), 3)
+        self.assertEqual(self.buffer.dropped, 2)
+
+    def test_events_are_append_only(self):
+        self.buffer.extend([audit.event('checkin', self.user)])
+        self.buffer.flush()
+        event = AuditEvent.objects.get()
+        event.action = 'checkout'
+        with self.assertRaises(ValueError):
+            event.save()
+        with self.assertRaises(ValueError):
+            event.delete()
+        self.assertEqual(self.actions(), ['checkin'])
+
+
+@override_settings(THROTTLE_ENABLED=False)
+class AuditLogTests(TestCase):
+    url = '/api/admin/audit/'
+
+    def setUp(self):
+        self.hr = make_user('hr@example.com', role='hr')
+        self.manager = make_user('lead@example.com', role='manager')
+        self.employee = make_user('emp@example.com', manager=self.manager)
+
+        def at(day, action, actor, subject):
+            event = audit.event(action, actor, subject)
+            occurred_at = make_aware(datetime.combine(day, dtime(12)))
+            return AuditEvent(**dict(event, occurred_at=occurred_at, month=audit.month_key(day)))
+
+        AuditEvent.objects.bulk_create([
+            at(date(2026, 1, 31), 'checkin', self.employee, self.employee),
+            at(date(2026, 2, 1), 'approve', self.manager, self.employee),
+            at(date(2026, 2, 15), 'checkin', self.manager, self.manager),
+            at(date(2026, 3, 1), 'reject', self.manager, self.employee),
+        ])
+
+    def test_query_api_filters(self):
+        self.assertEqual(audit.events(actor=self.manager).count(), 3)
+        self.assertEqual(audit.events(subject=self.employee).count(), 3)
+        self.assertEqual(audit.events(start=date(2026, 2, 1), end=date(2026, 2, 28)).count(), 2)
+        self.assertEqual(audit.events(start=date(2026, 2, 15)).count(), 2)
+        self.assertEqual(audit.events(end=date(2026, 1, 31)).count(), 1)
+        self.assertEqual(
+            list(audit.events(actor=self.manager, subject=self.employee).values_list('action', flat=True)),
+            ['reject', 'approve'],
+        )
+
+    def test_endpoint(self):
+        response = self.client.get(
+            self.url, {'actor': self.manager.id, 'start': '2026-02-01', 'action': 'approve'}, headers=auth(self.hr)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['action'] for r in response.json()['results']], ['approve'])
+
+        self.assertEqual(self.client.get(self.url, {'actor': 'x'}, headers=auth(self.hr)).status_code, 400)
+        self.assertEqual(self.client.get(self.url, headers=auth(self.employee)).status_code, 403)
+
+
+# ✅ Request profiling
+class ProfilingTests(TestCase):
+    url = '/api/employee/today/'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.admin = make_user('admin@example.com', role='admin')
+        self.employee = make_user('emp@example.com')
+        caches['default'].clear()
+
+    def settings_for(self, rate=0.0):
+        return self.settings(
+            PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=rate, PROFILING_INTERVAL=0.001,
+            PROFILING_DIR=self.directory, THROTTLE_ENABLED=False,
+        )
+
+    def get(self, user, profile=False):
+        headers = dict(auth(user), **({'x-profile': '1'} if profile else {}))
+        # A fresh client loads the middleware with the current PROFILING_* settings
+        return self.client_class().get(self.url, headers=headers)
+
+    def profiles(self):
+        return sorted(Path(self.directory).glob(f"*{profiling.FOLDED_SUFFIX}"))
+
+    def test_admin_header_profiles_and_names_the_file(self):
+        with self.settings_for():
+            response = self.get(self.admin, profile=True)
+        [path] = self.profiles()
+        self.assertEqual(response['X-Profile'], path.name)
+        meta, _ = profiling.read_profile(path)
+        self.assertEqual((meta['view'], meta['method'], meta['status']), ('employee-today', 'GET', '200'))
+        self.assertGreater(int(meta['queries']), 0)
+
+    def test_header_from_non_admins_is_ignored(self):
+        with self.settings_for():
+            response = self.get(self.employee, profile=True)
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(self.profiles(), [])
+
+    def test_sampled_requests_are_profiled_without_the_header(self):
+        with self.settings_for(rate=1.0):
+            response = self.get(self.employee)
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(len(self.profiles()), 1)
+        with self.settings_for(rate=0.0):
+            self.get(self.employee)
+        self.assertEqual(len(self.profiles()), 1)
+
+    def test_collapsed_stacks_and_report(self):
+        profiler = profiling.SamplingProfiler(threading.get_ident(), 0.001)
+        profiler.start()
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        profiler.stop()
+        self.assertTrue(profiler.samples)
+
+        path = profiling.write_profile(self.directory, {'view': 'core:busy', 'duration_ms': 50, 'queries': 2}, profiler.samples)
+        lines = [l for l in path.read_text().splitlines() if not l.startswith('# ')]
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertIn('test_collapsed_stacks_and_report (tests.py:', stack.split(';')[-1])
+        self.assertEqual(profiling.read_profile(path), ({'view': 'core:busy', 'duration_ms': '50', 'queries': '2'}, profiler.samples))
+
+        out, folded = io.StringIO(), tempfile.mkdtemp()
+        call_command('profile_report', dir=self.directory, folded_out=folded, stdout=out)
+        self.assertIn('core:busy: 1 requests, avg 50.0ms, avg 2.0 queries', out.getvalue())
+        self.assertIn('test_collapsed_stacks_and_report', out.getvalue())
+        self.assertTrue((Path(folded) / f"core_busy{profiling.FOLDED_SUFFIX}").exists())
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+
+# ✅ Token buckets: `capacity` tokens, refilled at `rate` tokens per second.
+# take() returns 0 when a token was taken, else the seconds until one is available.
+# Bounded LRU: anonymous scopes see one key per client IP, so the least recently used
+# buckets (almost always refilled to capacity already) are evicted past `max_keys`.
+class LocalBuckets:
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at), least recently used first
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1 if tokens >= 1 else tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    async def atake(self, key, capacity, rate):
+        # In memory under a short lock: nothing to wait for
+        return self.take(key, capacity, rate)
+
+
+# Shared across workers through a Django cache (e.g. Redis/Memcached). get/set is not
+# atomic, so concurrent workers can overdraw a bucket slightly; that is fine for throttling.
+class CacheBuckets:
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    @staticmethod
+    def _refill(entry, capacity, rate, now):
+        tokens, updated = entry or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            return (tokens - 1, now), 0
+        return (tokens, now), (1 - tokens) / rate
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        cache_key = f"throttle:{key}"
+        entry, wait = self._refill(self.cache.get(cache_key), capacity, rate, now)
+        self.cache.set(cache_key, entry, int(capacity / rate) + 1)
+        return wait
+
+    # Same through the async cache API, so ASGI views never block the event loop on the network
+    async def atake(self, key, capacity, rate):
+        now = time.time()
+        cache_key = f"throttle:{key}"
+        entry, wait = self._refill(await self.cache.aget(cache_key), capacity, rate, now)
+        await self.cache.aset(cache_key, entry, int(capacity / rate) + 1)
+        return wait
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.THROTTLE_BACKEND == 'cache':
+                    _backend = CacheBuckets(settings.THROTTLE_CACHE)
+                else:
+                    _backend = LocalBuckets(getattr(settings, 'THROTTLE_LOCAL_MAX_KEYS', 10000))
+    return _backend
+
+
+# (key, capacity, rate) for every bucket `scope` draws from. 'account' buckets key on the
+# IP plus the submitted account (login email), so one office NAT address is not one bucket.
+def _buckets(scope, ident, user=None, account=None):
+    if not settings.THROTTLE_ENABLED:
+        return []
+    limits = settings.THROTTLE_BUCKETS.get(scope, {})
+    keys = []
+    if account and 'account' in limits:
+        keys.append(('account', f"{ident}:{account.strip().lower()}"))
+    if user is not None and user.is_authenticated and 'user' in limits:
+        keys.append(('user', user.pk))
+    if 'ip' in limits:
+        keys.append(('ip', ident))
+    return [(f"{scope}:{kind}:{value}", *limits[kind]) for kind, value in keys]
+
+
+# ✅ Seconds to wait before `scope` may be used again by this user / IP (0 = allowed)
+def throttle_wait(scope, ident, user=None, account=None):
+    backend = get_backend()
+    for key, capacity, rate in _buckets(scope, ident, user, account):
+        wait = backend.take(key, capacity, rate)
+        if wait:
+            return wait
+    return 0
+
+
+async def athrottle_wait(scope, ident, user=None, account=None):
+    backend = get_backend()
+    for key, capacity, rate in _buckets(scope, ident, user, account):
+        wait = await backend.atake(key, capacity, rate)
+        if wait:
+            return wait
+    return 0
+
+
+# ✅ DRF throttle: set `throttle_scope` on the view, like ScopedRateThrottle, and
+# `throttle_account_field` to key 'account' buckets on a submitted field
+class TokenBucketThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return True
+        account = None
+        field = getattr(view, 'throttle_account_field', None)
+        if field and hasattr(request.data, 'get'):
+            account = request.data.get(field)
+            account = account if isinstance(account, str) else None
+        self._wait = throttle_wait(scope, self.get_ident(request), request.user, account)
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+# ✅ Load shedding: refuse new work with 503 before the DB pool is exhausted.
+# Counts in-flight requests per process; writes are shed before reads.
+class LoadSheddingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.limits = getattr(settings, 'LOAD_SHED_LIMITS', None)
+        if not self.limits:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.retry_after = str(settings.LOAD_SHED_RETRY_AFTER)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _admit(self, request):
+        kind = 'read' if request.method in ('GET', 'HEAD', 'OPTIONS') else 'write'
+        with self._lock:
+            if self._in_flight >= self.limits[kind]:
+                return False
+            self._in_flight += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _shed(self):
+        response = JsonResponse({'error': 'Server busy, retry shortly'}, status=503)
+        response['Retry-After'] = self.retry_after
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._admit(request):
+            return self._shed()
+        try:
+            return self.get_response(request)
+        finally:
+            self._release()
+
+    async def __acall__(self, request):
+        if not self._admit(request):
+            return self._shed()
+        try:
+            return await self.get_response(request)
+        finally:
+            self._release()
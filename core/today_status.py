@@ -0,0 +1,129 @@
+import math
+import threading
+import time as clock
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.timezone import localtime, make_aware
+
+from . import checkin_buffer
+from .models import Attendance
+
+# ✅ "Am I checked in, and since when?" per user per local day. Entries expire at local
+# midnight; the date is part of the key, so a late clock can never serve yesterday.
+# Check-in and check-out only ever add facts during a day, so a positive entry is
+# safe to act on even when it is stale; "not checked in" is kept briefly.
+# Only the check-in/check-out writes overwrite an entry (store); states read from the DB
+# are only added (remember), so a slow read can never undo a concurrent punch.
+# With a per-process cache (LocMem) another worker may have punched since: the
+# short-circuits still hold, but the status read only trusts a final (checked-out)
+# entry, or any entry younger than TODAY_STATUS_LOCAL_TTL seconds.
+
+
+def _cache():
+    return caches[getattr(settings, 'TODAY_STATUS_CACHE', 'default')]
+
+
+def is_shared():
+    return not isinstance(_cache(), LocMemCache)
+
+
+def _key(user_id, day):
+    return f"today:{user_id}:{day.isoformat()}"
+
+
+def seconds_until_midnight(at=None):
+    local = localtime(at)
+    midnight = make_aware(datetime.combine(local.date() + timedelta(days=1), time.min))
+    return max(1, math.ceil((midnight - local).total_seconds()))
+
+
+def not_checked_in(day):
+    return {'date': day, 'checked_in': False, 'check_in': None, 'check_out': None, 'total_hours': 0.0}
+
+
+def from_attendance(attendance):
+    return {
+        'date': attendance.date,
+        'checked_in': True,
+        'check_in': attendance.check_in,
+        'check_out': attendance.check_out,
+        'total_hours': attendance.total_hours or 0.0,
+    }
+
+
+def _timeout(status):
+    timeout = seconds_until_midnight()
+    if not status['checked_in']:
+        timeout = min(timeout, getattr(settings, 'TODAY_STATUS_NEGATIVE_TTL', 60))
+        if not is_shared():
+            timeout = min(timeout, getattr(settings, 'TODAY_STATUS_LOCAL_TTL', 10))
+    return timeout
+
+
+def _progress(status):
+    # Facts only accumulate during a day: not checked in < checked in < checked out
+    return int(status['checked_in']) + int(status['check_out'] is not None)
+
+
+_local_lock = threading.Lock()
+
+
+# ✅ State just written by a punch (or final for the day): replaces whatever is cached
+def store(user_id, status):
+    with _local_lock:
+        _cache().set(_key(user_id, status['date']), (clock.time(), status), _timeout(status))
+    return status
+
+
+# ✅ State read from the DB: cached only if nothing newer got there first. A shared cache
+# uses add(); a per-process one can check and set under a lock, which also lets an
+# aged entry be refreshed.
+def remember(user_id, status):
+    key = _key(user_id, status['date'])
+    if is_shared():
+        _cache().add(key, (clock.time(), status), _timeout(status))
+        return status
+    with _local_lock:
+        current = _cache().get(key)
+        if current is None or _progress(current[1]) <= _progress(status):
+            _cache().set(key, (clock.time(), status), _timeout(status))
+    return status
+
+
+# Last known state, possibly stale on a per-process cache: fine for the punch
+# short-circuits, which only act on facts ("checked in", "checked out")
+def cached(user_id, day):
+    entry = _cache().get(_key(user_id, day))
+    return entry[1] if entry else None
+
+
+def _trusted(user_id, day):
+    entry = _cache().get(_key(user_id, day))
+    if entry is None:
+        return None
+    stored_at, status = entry
+    if is_shared() or status['check_out'] is not None:
+        return status
+    if clock.time() - stored_at <= getattr(settings, 'TODAY_STATUS_LOCAL_TTL', 10):
+        return status
+    return None
+
+
+# ✅ Cache first, then the write-behind buffer, then one indexed row lookup
+def get_status(user, day):
+    status = _trusted(user.id, day)
+    if status is not None:
+        return status
+
+    if checkin_buffer.is_enabled():
+        for entry in checkin_buffer.get_buffer().pending_for_user(user.id):
+            if entry['date'] == day:
+                return remember(user.id, from_attendance(
+                    Attendance(user=user, date=day, check_in=entry['check_in'])
+                ))
+
+    attendance = Attendance.objects.filter(user=user, date=day).first()
+    return remember(user.id, from_attendance(attendance) if attendance else not_checked_in(day))
@@ -21,14 +21,17 @@ from .views import (
     AdminAllRegularizations,
     HRTodaySummaryView,
     HRManagerRegularizationCreate,  # ✅ missing import added here!
+    AdminBulkUserImportView,
 )
 from django.urls import path
 from . import views
+from . import async_views
 
 urlpatterns = [
     # 🔐 Auth
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('login/async/', async_views.async_login, name='login-async'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
     # 🧑‍💼 Manager List for Registration Dropdown
@@ -36,31 +39,46 @@ urlpatterns = [
 
     # 📆 Attendance
     path('employee/attendance/', EmployeeAttendanceList.as_view(), name='employee-attendance'),
+    path('employee/attendance/async/', async_views.async_employee_attendance, name='employee-attendance-async'),
     path('employee/checkin/', CheckInView.as_view(), name='employee-checkin'),
     path('employee/checkout/', CheckOutView.as_view(), name='employee-checkout'),
+    path('employee/month-summary/', views.month_summary, name='employee-month-summary'),
+    path('employee/today/', views.today_status_view, name='employee-today'),
 
     # 📩 Regularization by Employee
     path('employee/regularize/', RegularizationCreate.as_view(), name='employee-regularize'),
     path('employee/my-regularizations/', MyRegularizations.as_view(), name='employee-my-regularizations'),
+    path('employee/my-regularizations/async/', async_views.async_my_regularizations, name='employee-my-regularizations-async'),
 
     # ✅ Approval (used by Manager or HR or Admin)
     path('manager/regularizations/', ManagerRegularizationsView.as_view(), name='manager-regularizations'),
     path('manager/regularizations/<int:pk>/approve/', ApproveRegularization.as_view(), name='approve-regularization'),
     path('manager/regularizations/<int:pk>/reject/', RejectRegularization.as_view(), name='reject-regularization'),
 
+    # 📥 Approver inbox (Manager / HR / Admin)
+    path('inbox/', views.ApproverInboxView.as_view(), name='approver-inbox'),
+    path('inbox/count/', views.inbox_count, name='approver-inbox-count'),
+
     # 📊 Team Attendance
     path('manager/attendance/', TeamAttendanceView.as_view(), name='team-attendance'),
+    path('manager/attendance/async/', async_views.async_team_attendance, name='team-attendance-async'),
 
     # 🧑‍⚕️ HR Panel
     path('hr/users/', HRUserListView.as_view(), name='hr-users'),
+    path('users/search/', views.UserSearchView.as_view(), name='user-search'),
     path('hr/regularizations/', HRAllRegularizationsView.as_view(), name='hr-regularizations'),
     path('hr/attendance/', HREmployeeAttendanceView.as_view(), name='hr-employee-attendance'),
     path('hr/summary/', HRTodaySummaryView, name='hr-summary'),
+    path('hr/summary/async/', async_views.async_hr_summary, name='hr-summary-async'),
+    path('hr/analytics/arrivals/', views.ArrivalAnalyticsView, name='hr-arrival-analytics'),
 
     # 👑 Admin Panel
     path('admin/users/', AdminUserListView.as_view(), name='admin-users'),
+    path('admin/users/import/', AdminBulkUserImportView.as_view(), name='admin-users-import'),
     path('admin/attendance/', AdminAttendanceView.as_view(), name='admin-attendance'),
     path('admin/regularizations/', AdminAllRegularizations.as_view(), name='admin-regularizations'),
+    path('admin/export/<str:dataset>/', views.ColumnarExportView.as_view(), name='admin-export'),
+    path('admin/audit/', views.AuditLogView.as_view(), name='admin-audit'),
     path('admin/regularizations/<int:pk>/approve/', ApproveRegularization.as_view(), name='admin-approve'),
     path('admin/regularizations/<int:pk>/reject/', RejectRegularization.as_view(), name='admin-reject'),
 
@@ -2,22 +2,37 @@ from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
-from django.utils.timezone import now, make_aware, localdate
-from datetime import datetime, time
+from django.utils.timezone import now, localdate, localtime
 from rest_framework.generics import ListAPIView
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.decorators import api_view, permission_classes
 from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_date
+from datetime import timedelta
 
 from .models import CustomUser, Attendance, RegularizationRequest
+from .bulk_import import import_users, parse_rows
+from .analytics import record_arrival, arrival_histogram
+from . import audit
+from . import inbox
+from . import checkin_buffer
+from .export import CONTENT_TYPES, available_formats, export_dataset
+from . import workcalendar
+from . import today_status
+from .search import search_users
 from .serializers import (
     RegisterSerializer,
     ManagerSerializer,
     AttendanceSerializer,
     RegularizationRequestSerializer,
     UserSerializer,
+    UserSearchSerializer,
+    AuditEventSerializer,
 )
 
 # ✅ Registration
@@ -25,10 +40,13 @@ class RegisterView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'register'
 
 # ✅ Login
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'login'
+    throttle_account_field = 'email'
 
     def post(self, request):
         email = request.data.get('email')
@@ -66,23 +84,64 @@ class EmployeeAttendanceList(generics.ListAPIView):
     def get_queryset(self):
         return Attendance.objects.filter(user=self.request.user).order_by('-date')
 
+    def list(self, request, *args, **kwargs):
+        if not checkin_buffer.is_enabled():
+            return super().list(request, *args, **kwargs)
+
+        # Merge in check-ins that are acknowledged but not flushed yet
+        pending = checkin_buffer.get_buffer().pending_for_user(request.user.id)
+        response = super().list(request, *args, **kwargs)
+        flushed = {row['date'] for row in response.data}
+        unflushed = [
+            Attendance(user=request.user, date=e['date'], check_in=e['check_in'])
+            for e in pending if e['date'].isoformat() not in flushed
+        ]
+        if unflushed:
+            response.data = AttendanceSerializer(unflushed, many=True).data + list(response.data)
+        return response
+
 # ✅ Check-In
 class CheckInView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'checkin'
 
     def post(self, request):
         user = request.user
-        today = now().date()
+        today = localdate()
+        buffered = checkin_buffer.is_enabled()
 
-        if Attendance.objects.filter(user=user, date=today).exists():
+        # Repeated taps are answered from the today-status cache without touching the DB
+        cached = today_status.cached(user.id, today)
+        if cached and cached['checked_in']:
+            return Response({'error': 'Already checked in today'}, status=400)
+        if buffered and checkin_buffer.get_buffer().is_pending(user.id, today):
+            return Response({'error': 'Already checked in today'}, status=400)
+        existing = Attendance.objects.filter(user=user, date=today).first()
+        if existing:
+            today_status.remember(user.id, today_status.from_attendance(existing))
             return Response({'error': 'Already checked in today'}, status=400)
 
         check_in_time = now()
-        office_start_naive = datetime.combine(today, time(10, 6))
-        office_start = make_aware(office_start_naive)
-        is_late = check_in_time > office_start
-
-        attendance = Attendance.objects.create(user=user, date=today, check_in=check_in_time)
+        is_late = workcalendar.is_late(user.shift_id, check_in_time)
+
+        if buffered:
+            # Acknowledged once it is durable in the local log; the flusher writes Attendance
+            if not checkin_buffer.get_buffer().submit(user, today, check_in_time):
+                return Response({'error': 'Already checked in today'}, status=400)
+            attendance = Attendance(user=user, date=today, check_in=check_in_time)
+            audit.record('checkin', user, user, date=today, check_in=check_in_time, late=is_late, buffered=True)
+        else:
+            try:
+                with transaction.atomic():
+                    attendance = Attendance.objects.create(
+                        user=user, date=today, check_in=check_in_time, team=user.manager_id or 0,
+                    )
+                    record_arrival(user, attendance.date, attendance.check_in)
+                    audit.record('checkin', user, user, attendance, date=today, check_in=check_in_time, late=is_late)
+            except IntegrityError:
+                # A concurrent check-in (another tab or worker) got there first
+                return Response({'error': 'Already checked in today'}, status=400)
+        today_status.store(user.id, today_status.from_attendance(attendance))
 
         return Response({
             'message': 'Check-in successful',
@@ -93,21 +152,35 @@ class CheckInView(APIView):
 # ✅ Check-Out
 class CheckOutView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'checkin'
 
     def post(self, request):
         user = request.user
-        today = now().date()
+        today = localdate()
+
+        cached = today_status.cached(user.id, today)
+        if cached and cached['check_out']:
+            return Response({'error': 'Already checked out'}, status=400)
+
+        if checkin_buffer.is_enabled() and checkin_buffer.get_buffer().is_pending(user.id, today):
+            checkin_buffer.get_buffer().flush()
 
         try:
             attendance = Attendance.objects.get(user=user, date=today)
 
             if attendance.check_out:
+                today_status.store(user.id, today_status.from_attendance(attendance))
                 return Response({'error': 'Already checked out'}, status=400)
 
             attendance.check_out = now()
             duration = attendance.check_out - attendance.check_in
             attendance.total_hours = round(duration.total_seconds() / 3600, 2)
             attendance.save()
+            audit.record(
+                'checkout', user, user, attendance,
+                date=today, check_out=attendance.check_out, total_hours=attendance.total_hours,
+            )
+            today_status.store(user.id, today_status.from_attendance(attendance))
 
             return Response({
                 'message': 'Check-out successful',
@@ -115,17 +188,64 @@ class CheckOutView(APIView):
             })
 
         except Attendance.DoesNotExist:
+            today_status.remember(user.id, today_status.not_checked_in(today))
             return Response({'error': 'No check-in found for today'}, status=404)
 
+# ✅ Today's status for the home screen, served from the per-user cache
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def today_status_view(request):
+    user = request.user
+    today = localdate()
+    status_today = today_status.get_status(user, today)
+    check_in = status_today['check_in']
+    return Response({
+        'date': today,
+        'checked_in': status_today['checked_in'],
+        'checked_out': status_today['check_out'] is not None,
+        'check_in': localtime(check_in) if check_in else None,
+        'check_out': localtime(status_today['check_out']) if status_today['check_out'] else None,
+        'total_hours': status_today['total_hours'],
+        'is_late': workcalendar.is_late(user.shift_id, check_in) if check_in else False,
+    })
+
+# ✅ Monthly summary from the work calendar (HR/Admin may pass user_id)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def month_summary(request):
+    user = request.user
+    user_id = request.query_params.get('user_id')
+    if user_id and str(user_id) != str(user.id):
+        if user.role not in ['hr', 'admin']:
+            return Response({'error': 'Unauthorized'}, status=403)
+        try:
+            user = CustomUser.objects.get(pk=user_id)
+        except (CustomUser.DoesNotExist, ValueError):
+            return Response({'error': 'User not found'}, status=404)
+
+    today = localdate()
+    try:
+        year = int(request.query_params.get('year', today.year))
+        month = int(request.query_params.get('month', today.month))
+        if not 1 <= month <= 12:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'Invalid year or month'}, status=400)
+
+    return Response(workcalendar.month_summary(user, year, month, today=today))
+
 # ✅ Regularization — Only EMPLOYEES can submit
 class RegularizationCreate(generics.CreateAPIView):
     serializer_class = RegularizationRequestSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'regularize'
 
     def perform_create(self, serializer):
         if self.request.user.role != 'employee':
             raise PermissionDenied("Only employees can submit regularization requests.")
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            reg = serializer.save(user=self.request.user)
+            inbox.request_created(reg)
 
 # ✅ View my own requests
 class MyRegularizations(generics.ListAPIView):
@@ -154,20 +274,24 @@ def can_approve(user, reg):
 # ✅ Approve Regularization
 class ApproveRegularization(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'approve'
 
     def post(self, request, pk):
         try:
-            reg = RegularizationRequest.objects.get(pk=pk)
+            with transaction.atomic():
+                reg = RegularizationRequest.objects.select_for_update().get(pk=pk)
 
-            if not can_approve(request.user, reg):
-                raise PermissionDenied("You are not authorized to approve this request.")
+                if not can_approve(request.user, reg):
+                    raise PermissionDenied("You are not authorized to approve this request.")
 
-            if reg.status != 'pending':
-                return Response({'error': 'Already processed'}, status=400)
+                if reg.status != 'pending':
+                    return Response({'error': 'Already processed'}, status=400)
 
-            reg.status = 'approved'
-            reg.approved_by = request.user
-            reg.save()
+                reg.status = 'approved'
+                reg.approved_by = request.user
+                reg.save()
+                inbox.request_resolved(reg)
+                audit.record('approve', request.user, reg.user_id, reg, date=reg.date)
             return Response({'message': '✅ Request approved'})
 
         except RegularizationRequest.DoesNotExist:
@@ -176,25 +300,50 @@ class ApproveRegularization(APIView):
 # ✅ Reject Regularization
 class RejectRegularization(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'approve'
 
     def post(self, request, pk):
         try:
-            reg = RegularizationRequest.objects.get(pk=pk)
+            with transaction.atomic():
+                reg = RegularizationRequest.objects.select_for_update().get(pk=pk)
 
-            if not can_approve(request.user, reg):
-                raise PermissionDenied("You are not authorized to reject this request.")
+                if not can_approve(request.user, reg):
+                    raise PermissionDenied("You are not authorized to reject this request.")
 
-            if reg.status != 'pending':
-                return Response({'error': 'Already processed'}, status=400)
+                if reg.status != 'pending':
+                    return Response({'error': 'Already processed'}, status=400)
 
-            reg.status = 'rejected'
-            reg.approved_by = request.user
-            reg.save()
+                reg.status = 'rejected'
+                reg.approved_by = request.user
+                reg.save()
+                inbox.request_resolved(reg)
+                audit.record('reject', request.user, reg.user_id, reg, date=reg.date)
             return Response({'message': '❌ Request rejected'})
 
         except RegularizationRequest.DoesNotExist:
             return Response({'error': '❌ Request not found'}, status=404)
 
+# ✅ Approver inbox: pending count + oldest pending requests
+class ApproverInboxView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+        except ValueError:
+            limit = 10
+        oldest = inbox.pending_requests(request.user)[:limit]
+        return Response({
+            'pending_count': inbox.pending_count(request.user),
+            'oldest_pending': RegularizationRequestSerializer(oldest, many=True).data,
+        })
+
+# ✅ Nav bar badge: a single counter lookup
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def inbox_count(request):
+    return Response({'pending_count': inbox.pending_count(request.user)})
+
 # ✅ Manager team attendance
 class TeamAttendanceView(generics.ListAPIView):
     serializer_class = AttendanceSerializer
@@ -224,6 +373,29 @@ class HRUserListView(ListAPIView):
             return CustomUser.objects.none()
         return CustomUser.objects.exclude(role='hr')
 
+# ✅ User directory search (HR/Admin: everyone, Manager: own team)
+class UserSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+class UserSearchView(ListAPIView):
+    serializer_class = UserSearchSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = UserSearchPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        params = self.request.query_params
+        manager = params.get('manager')
+        if user.role == 'manager':
+            manager = user.id
+        elif user.role not in ['hr', 'admin']:
+            return CustomUser.objects.none()
+        if manager and not str(manager).isdigit():
+            return CustomUser.objects.none()
+        return search_users(params.get('q'), role=params.get('role'), manager=manager)
+
 # ✅ HR sees all regularizations
 class HRAllRegularizationsView(ListAPIView):
     serializer_class = RegularizationRequestSerializer
@@ -257,11 +429,14 @@ class HREmployeeAttendanceView(ListAPIView):
 class HRManagerRegularizationCreate(generics.CreateAPIView):
     serializer_class = RegularizationRequestSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'regularize'
 
     def perform_create(self, serializer):
         if self.request.user.role not in ['hr', 'manager']:
             raise PermissionDenied("Only HR or Manager can submit to Admin.")
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            reg = serializer.save(user=self.request.user)
+            inbox.request_created(reg)
 
 # ✅ HR's Own Requests
 @api_view(['GET'])
@@ -283,8 +458,9 @@ def HRTodaySummaryView(request):
     attendances = Attendance.objects.filter(date=today)
 
     total_present = attendances.count()
-    on_time = attendances.filter(check_in__lte=datetime.combine(today, time(9, 30))).count()
-    late = attendances.filter(check_in__gt=datetime.combine(today, time(9, 30))).count()
+    shift_ids = attendances.values_list('user__shift_id', flat=True).distinct()
+    late = attendances.filter(workcalendar.late_filter(today, shift_ids)).count()
+    on_time = total_present - late
     pending_requests = RegularizationRequest.objects.filter(status='pending').count()
 
     return Response({
@@ -294,6 +470,37 @@ def HRTodaySummaryView(request):
         'pending_requests': pending_requests
     })
 
+# ✅ Arrival-time distribution (HR/Admin: all teams, Manager: own team)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def ArrivalAnalyticsView(request):
+    user = request.user
+    if user.role not in ['hr', 'admin', 'manager']:
+        return Response({'error': 'Unauthorized'}, status=403)
+
+    try:
+        end = parse_date(request.query_params.get('to') or '') or localdate()
+        start = parse_date(request.query_params.get('from') or '') or end - timedelta(days=27)
+    except ValueError:
+        # Well formed but not a real date, e.g. 2026-02-30
+        return Response({'error': "'from' and 'to' must be valid YYYY-MM-DD dates"}, status=400)
+    if start > end:
+        return Response({'error': "'from' must not be after 'to'"}, status=400)
+
+    group = request.query_params.get('group', 'week')
+    if group not in ['week', 'day']:
+        return Response({'error': "group must be 'week' or 'day'"}, status=400)
+
+    team = request.query_params.get('team')
+    if user.role == 'manager':
+        teams = [user.id]
+    elif team:
+        teams = [int(team)] if team.isdigit() else []
+    else:
+        teams = None
+
+    return Response(arrival_histogram(start, end, teams=teams, group=group))
+
 # ✅ Admin - Users
 class AdminUserListView(generics.ListAPIView):
     serializer_class = UserSerializer
@@ -304,6 +511,33 @@ class AdminUserListView(generics.ListAPIView):
             return CustomUser.objects.none()
         return CustomUser.objects.all().order_by('id')
 
+# ✅ Admin - Bulk user import (CSV/JSON upload or JSON body)
+class AdminBulkUserImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'import'
+
+    def post(self, request):
+        if request.user.role != 'admin':
+            raise PermissionDenied("Only admins can import users.")
+
+        upload = request.FILES.get('file')
+        try:
+            if upload:
+                fmt = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+                rows = parse_rows(upload.read(), fmt)
+            else:
+                rows = request.data if isinstance(request.data, list) else request.data.get('users', [])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        if not isinstance(rows, list):
+            return Response({'error': "'users' must be a list of rows"}, status=400)
+
+        dry_run = request.query_params.get('dry_run', '').lower() in ['1', 'true', 'yes', 'on']
+        report = import_users(rows, dry_run=dry_run, actor=request.user)
+        if report['errors']:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
 # ✅ Admin - Attendance
 class AdminAttendanceView(generics.ListAPIView):
     serializer_class = AttendanceSerializer
@@ -324,6 +558,58 @@ class AdminAttendanceView(generics.ListAPIView):
 
         return queryset.order_by('-date')
 
+# ✅ Columnar export for BI (Arrow IPC / Parquet with pyarrow, msgpack fallback)
+class ColumnarExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, dataset):
+        if request.user.role not in ['hr', 'admin']:
+            raise PermissionDenied("Only HR or Admin can export data.")
+
+        formats = available_formats()
+        fmt = request.query_params.get('fmt') or (formats[0] if formats else '')
+        try:
+            chunks = export_dataset(dataset, fmt)
+        except ValueError as e:
+            return Response({'error': str(e), 'formats': formats}, status=400)
+
+        extension = 'arrows' if fmt == 'arrow' else fmt
+        response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{extension}"'
+        return response
+
+# ✅ Audit trail (HR/Admin): filter by actor, subject user, date range and action
+class AuditLogView(ListAPIView):
+    serializer_class = AuditEventSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = UserSearchPagination
+
+    def get_queryset(self):
+        if self.request.user.role not in ['hr', 'admin']:
+            raise PermissionDenied("Only HR or Admin can read the audit trail.")
+
+        params = self.request.query_params
+        filters = {}
+        for name in ['actor', 'subject']:
+            value = params.get(name)
+            if value:
+                if not value.isdigit():
+                    raise ValidationError({name: 'Must be a user id'})
+                filters[name] = int(value)
+        for name in ['start', 'end']:
+            value = params.get(name)
+            if value:
+                try:
+                    filters[name] = parse_date(value)
+                except ValueError:
+                    filters[name] = None
+                if filters[name] is None:
+                    raise ValidationError({name: 'Must be a valid YYYY-MM-DD date'})
+
+        # Make this worker's own recent events visible; other workers flush on their interval
+        audit.flush()
+        return audit.events(action=params.get('action'), **filters)
+
 # ✅ Admin - Regularizations
 class AdminAllRegularizations(generics.ListAPIView):
     serializer_class = RegularizationRequestSerializer
@@ -0,0 +1,281 @@
+import calendar
+import threading
+import time as clock
+from array import array
+from datetime import date, datetime, time
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils.timezone import localtime, make_aware
+
+# ✅ Single source for attendance rules. Users with a Shift use its values;
+# everyone else uses settings.ATTENDANCE_POLICY.
+
+# The version is a one-row DB counter so that every worker sees it, whatever the cache.
+# How long a process trusts its last read of the shared version before re-checking
+VERSION_TTL = getattr(settings, 'CALENDAR_VERSION_TTL', 5.0)
+
+_lock = threading.Lock()
+_months = {}  # (shift_id, year, month) -> MonthCalendar
+_policies = {}  # shift_id -> ShiftPolicy (None = default policy)
+_version = {'value': None, 'checked_at': 0.0}
+
+
+def _parse_time(value):
+    return value if isinstance(value, time) else time.fromisoformat(value)
+
+
+def _seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+class ShiftPolicy:
+    __slots__ = ('shift_id', 'start', 'late_after', 'end', 'min_hours', 'weekly_off')
+
+    def __init__(self, shift_id, start, late_after, end, min_hours, weekly_off):
+        self.shift_id = shift_id
+        self.start = start
+        self.late_after = late_after
+        self.end = end
+        self.min_hours = min_hours
+        self.weekly_off = weekly_off  # Bit n set = date.weekday() n is off
+
+    @classmethod
+    def default(cls):
+        policy = settings.ATTENDANCE_POLICY
+        weekly_off = 0
+        for weekday in policy['WEEKLY_OFF']:
+            weekly_off |= 1 << weekday
+        return cls(
+            None,
+            _parse_time(policy['START']),
+            _parse_time(policy['LATE_AFTER']),
+            _parse_time(policy['END']),
+            float(policy['MIN_HOURS']),
+            weekly_off,
+        )
+
+
+# ✅ One user-month: bit (day - 1) of `working` is set for working days; the
+# arrays hold each day's shift window in seconds since local midnight.
+class MonthCalendar:
+    __slots__ = ('year', 'month', 'days', 'working', 'start', 'late_after', 'end', 'min_hours')
+
+    def __init__(self, year, month, days, working, start, late_after, end, min_hours):
+        self.year = year
+        self.month = month
+        self.days = days
+        self.working = working
+        self.start = start
+        self.late_after = late_after
+        self.end = end
+        self.min_hours = min_hours
+
+    def is_working(self, day):
+        return bool(self.working >> (day - 1) & 1)
+
+
+# ✅ Versioned invalidation: Shift/Holiday writes bump a shared counter
+def _version_rows():
+    return apps.get_model('core', 'CalendarVersion').objects.filter(pk=1)
+
+
+def bump_calendar_version():
+    if not _version_rows().update(value=F('value') + 1):
+        apps.get_model('core', 'CalendarVersion').objects.get_or_create(pk=1)
+        _version_rows().update(value=F('value') + 1)
+    with _lock:
+        _version['checked_at'] = 0.0  # Re-check immediately in this process
+
+
+def _sync_version():
+    now = clock.monotonic()
+    if now - _version['checked_at'] < VERSION_TTL:
+        return
+    _apply_version(_version_rows().values_list('value', flat=True).first() or 0, now)
+
+
+def _apply_version(current, now):
+    with _lock:
+        if current != _version['value']:
+            _months.clear()
+            _policies.clear()
+            _version['value'] = current
+        _version['checked_at'] = now
+
+
+def policy_for(shift_id):
+    _sync_version()
+    policy = _policies.get(shift_id)
+    if policy is None:
+        policy = ShiftPolicy.default()
+        if shift_id is not None:
+            shift = apps.get_model('core', 'Shift').objects.filter(pk=shift_id).first()
+            if shift is not None:
+                policy = ShiftPolicy(
+                    shift.id, shift.start_time, shift.late_after, shift.end_time, shift.min_hours, shift.weekly_off
+                )
+        _policies[shift_id] = policy
+    return policy
+
+
+def _compile(shift_id, year, month):
+    policy = policy_for(shift_id)
+    days = calendar.monthrange(year, month)[1]
+    holidays = set(
+        apps.get_model('core', 'Holiday').objects
+        .filter(date__year=year, date__month=month)
+        .filter(Q(shift__isnull=True) | Q(shift_id=shift_id))
+        .values_list('date', flat=True)
+    )
+    working = 0
+    for day in range(1, days + 1):
+        current = date(year, month, day)
+        if not policy.weekly_off >> current.weekday() & 1 and current not in holidays:
+            working |= 1 << (day - 1)
+    return MonthCalendar(
+        year, month, days, working,
+        array('i', [_seconds(policy.start)] * days),
+        array('i', [_seconds(policy.late_after)] * days),
+        array('i', [_seconds(policy.end)] * days),
+        policy.min_hours,
+    )
+
+
+def month_calendar(shift_id, year, month):
+    _sync_version()
+    key = (shift_id, year, month)
+    cal = _months.get(key)
+    if cal is None:
+        cal = _compile(shift_id, year, month)
+        with _lock:
+            _months[key] = cal
+    return cal
+
+
+# ✅ Rules used by models, views and batches
+def is_working_day(shift_id, day):
+    return month_calendar(shift_id, day.year, day.month).is_working(day.day)
+
+
+def _cutoff_time(cal, day):
+    seconds = cal.late_after[day.day - 1]
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def late_cutoff(shift_id, day):
+    return _cutoff_time(month_calendar(shift_id, day.year, day.month), day)
+
+
+def is_late(shift_id, check_in):
+    local = localtime(check_in)
+    return is_late_in(month_calendar(shift_id, local.year, local.month), check_in)
+
+
+def min_hours(shift_id):
+    return policy_for(shift_id).min_hours
+
+
+def default_late_after():
+    return ShiftPolicy.default().late_after
+
+
+def _late_condition(day, cutoffs):
+    condition = Q(pk__in=[])
+    for shift_id, cutoff in cutoffs:
+        cutoff = make_aware(datetime.combine(day, cutoff))
+        if shift_id is None:
+            condition |= Q(user__shift__isnull=True, check_in__gt=cutoff)
+        else:
+            condition |= Q(user__shift_id=shift_id, check_in__gt=cutoff)
+    return condition
+
+
+# ✅ Q matching late check-ins on `day`, one aware cutoff per shift in use
+def late_filter(day, shift_ids):
+    return _late_condition(day, [(shift_id, late_cutoff(shift_id, day)) for shift_id in shift_ids])
+
+
+# ✅ Shift ids (None = default policy) that work on `day`
+def working_shift_ids(day):
+    shift_ids = [None] + list(apps.get_model('core', 'Shift').objects.values_list('id', flat=True))
+    return [shift_id for shift_id in shift_ids if is_working_day(shift_id, day)]
+
+
+# ✅ Month summary for one user from two queries and bit operations
+def month_summary(user, year, month, today=None):
+    cal = month_calendar(user.shift_id, year, month)
+    Attendance = apps.get_model('core', 'Attendance')
+    RegularizationRequest = apps.get_model('core', 'RegularizationRequest')
+
+    present = late = enough_hours = 0
+    rows = Attendance.objects.filter(user=user, date__year=year, date__month=month)
+    for day, check_in, total_hours in rows.values_list('date', 'check_in', 'total_hours'):
+        bit = 1 << (day.day - 1)
+        present |= bit
+        if is_late(user.shift_id, check_in):
+            late |= bit
+        if total_hours >= cal.min_hours:
+            enough_hours |= bit
+
+    regularized = 0
+    approved = RegularizationRequest.objects.filter(
+        user=user, status='approved', date__year=year, date__month=month
+    ).values_list('date', flat=True)
+    for day in approved:
+        regularized |= 1 << (day.day - 1)
+
+    # Only days that have already passed can be absent
+    today = today or localtime().date()
+    if (year, month) < (today.year, today.month):
+        elapsed = (1 << cal.days) - 1
+    elif (year, month) == (today.year, today.month):
+        elapsed = (1 << (today.day - 1)) - 1
+    else:
+        elapsed = 0
+
+    valid = present & enough_hours & (~late | regularized)
+    absent = cal.working & elapsed & ~present
+    return {
+        'year': year,
+        'month': month,
+        'working_days': cal.working.bit_count(),
+        'present': present.bit_count(),
+        'late': late.bit_count(),
+        'valid': valid.bit_count(),
+        'absent': absent.bit_count(),
+        'regularized': (late & regularized).bit_count(),
+        'absent_days': [day for day in range(1, cal.days + 1) if absent >> (day - 1) & 1],
+    }
+
+
+# ✅ Async access for the ASGI views: compile off the event loop, evaluate rules in memory
+async def _async_sync_version():
+    # Same check through the async ORM, so the event loop never blocks on the query
+    now = clock.monotonic()
+    if now - _version['checked_at'] < VERSION_TTL:
+        return
+    _apply_version(await _version_rows().values_list('value', flat=True).afirst() or 0, now)
+
+
+async def amonth_calendar(shift_id, year, month):
+    await _async_sync_version()
+    cal = _months.get((shift_id, year, month))
+    if cal is None:
+        cal = await sync_to_async(month_calendar)(shift_id, year, month)
+    return cal
+
+
+def is_late_in(cal, check_in):
+    local = localtime(check_in)
+    return _seconds(local) + local.microsecond / 1e6 > cal.late_after[local.day - 1]
+
+
+async def alate_filter(day, shift_ids):
+    cutoffs = []
+    for shift_id in shift_ids:
+        cal = await amonth_calendar(shift_id, day.year, day.month)
+        cutoffs.append((shift_id, _cutoff_time(cal, day)))
+    return _late_condition(day, cutoffs)